@@ -0,0 +1,446 @@
+"""The admin area: match management, odds import, the profiler and visitor analytics.
+
+Registered on the admin app only (admin.html), which also tracks visits.
+"""
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from flask import Blueprint, Response, current_app, jsonify, render_template, request, url_for
+
+import bulk
+from models import Prediction, Status
+from rollups import ALL_PAGES, DEFAULT_SPANS
+from services import services, track_visitor
+from store import search_args_from
+from surebets import validate_quote
+from visitlog import history_args_from, recent_from
+
+bp = Blueprint("admin", __name__)
+
+
+@bp.route("/admin/matches")
+def admin_matches():
+    """One page of the match table; see store.search_args_from for parameters"""
+    # Track admin matches page visit
+    track_visitor('Admin-Matches')
+    
+    # Get success/error messages from URL parameters
+    message = request.args.get('message', '')
+    error = request.args.get('error', '')
+    
+    store = services().predictions
+    try:
+        search = search_args_from(request.args)
+        predictions, total = store.search(**search)
+    except ValueError as e:
+        search = search_args_from({})
+        predictions, total = store.search(**search)
+        error = str(e)
+    
+    pages = max(1, -(-total // search["per_page"]))
+    
+    def table_url(**changes):
+        # This table view with some parameters changed, messages dropped
+        args = {key: value for key, value in request.args.items() if key not in ("message", "error")}
+        args.update(changes)
+        return url_for(".admin_matches", **{key: value for key, value in args.items() if value})
+    
+    return render_template(
+        "admin/matches.html",
+        predictions=predictions,
+        total=total,
+        pages=pages,
+        search=search,
+        table_url=table_url,
+        message=message,
+        error=error
+    )
+
+@bp.route("/admin/matches/add", methods=["POST"])
+def add_match():
+    try:
+        # Validate the form data into a typed record
+        new_match = Prediction.parse(request.form)
+        new_match.status = Status.ACTIVE
+        new_match.created_at = datetime.now().replace(microsecond=0)
+    except ValueError as e:
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error={quote(f"Invalid match: {e}")}';
+        </script>
+        """
+    
+    try:
+        # Add to the prediction store (assigns the id)
+        services().predictions.add(new_match.to_row())
+        
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?message=Match prediction added successfully!';
+        </script>
+        """
+        
+    except Exception as e:
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Error adding match: {str(e)}';
+        </script>
+        """
+
+def wants_json():
+    """Whether the client asked for JSON rather than a page (fetch from the match table)"""
+    return request.accept_mimetypes.best_match(["application/json", "text/html"]) == "application/json"
+
+@bp.route("/admin/matches/import", methods=["POST"])
+def import_matches():
+    """Add many predictions from a CSV or NDJSON upload in one transaction
+
+    Send the file as the 'file' form field or as the raw request body;
+    the format comes from ?format=, the file name or the content type.
+    Valid rows are inserted and invalid ones reported by line number.
+    """
+    upload = request.files.get("file")
+    if upload:
+        data, fmt = upload.read(), bulk.guess_format(upload.filename or "", upload.mimetype)
+    else:
+        data, fmt = request.get_data(), bulk.guess_format(mimetype=request.mimetype)
+    fmt = request.values.get("format") or fmt
+    
+    # Browsers posting the form on /admin/matches go back to it
+    from_form = not wants_json()
+    
+    try:
+        rows, errors = bulk.parse_upload(data, fmt)
+    except ValueError as e:
+        if from_form:
+            return f"""
+        <script>
+            window.location.href = '/admin/matches?error={quote(f"Import failed: {e}")}';
+        </script>
+        """
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    ids = services().predictions.add_many(rows)
+    
+    if from_form:
+        message = f"Imported {len(ids)} matches"
+        if errors:
+            details = "; ".join(f"line {error['line']}: {error['error']}" for error in errors[:5])
+            message += f", skipped {len(errors)} invalid rows ({details})"
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?{'error' if errors else 'message'}={quote(message)}';
+        </script>
+        """
+    
+    return jsonify({
+        "status": "success",
+        "imported": len(ids),
+        "ids": ids,
+        "errors": errors
+    })
+
+@bp.route("/admin/matches/export")
+def export_matches():
+    """Stream every prediction as CSV (default) or NDJSON (?format=ndjson)
+
+    Optional ?status=active|inactive. Rows are read and written in
+    chunks, so the export never builds the whole document in memory.
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in bulk.FORMATS:
+        return jsonify({"status": "error", "message": f"format must be one of {', '.join(bulk.FORMATS)}"}), 400
+    
+    rows = services().predictions.iter_rows(status=request.args.get("status"))
+    body = bulk.export_csv(rows) if fmt == "csv" else bulk.export_ndjson(rows, dumps=current_app.json.dumps_compact)
+    filename = f"predictions-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(body, mimetype=bulk.FORMATS[fmt], headers={
+        "Content-Disposition": f"attachment; filename={filename}"
+    })
+
+@bp.route("/admin/odds", methods=["POST"])
+def import_odds():
+    """Add or update bookmaker prices from a JSON array of quotes
+
+    Each quote is {"event_id", "market", "outcome", "bookmaker", "price"}
+    where event_id is a prediction id; see surebets.MARKETS. Valid quotes
+    are stored in one transaction and invalid ones reported by index.
+    """
+    try:
+        quotes = request.get_json(force=True)
+    except Exception:
+        quotes = None
+    if isinstance(quotes, dict):
+        quotes = quotes.get("quotes")
+    if not isinstance(quotes, list):
+        return jsonify({"status": "error", "message": "expected a JSON array of quotes"}), 400
+    
+    parsed, errors = [], []
+    for index, item in enumerate(quotes):
+        try:
+            parsed.append((index, validate_quote(item)))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    
+    # Quotes must price an existing prediction
+    store = services().predictions
+    events = store.get_many({row[0] for _, row in parsed})
+    valid = []
+    for index, row in parsed:
+        if row[0] in events:
+            valid.append(row)
+        else:
+            errors.append({"index": index, "error": f"no prediction with id {row[0]}"})
+    errors.sort(key=lambda error: error["index"])
+    if valid:
+        store.add_quotes(valid)
+    
+    return jsonify({"status": "success", "imported": len(valid), "errors": errors})
+
+@bp.route("/admin/matches/toggle/<int:match_id>", methods=["POST"])
+def toggle_match_status(match_id):
+    """Pause or activate a match; JSON clients get the updated row back"""
+    try:
+        # Toggle match status by primary key
+        match = services().predictions.toggle_status(match_id)
+        if match is not None:
+            status_text = "activated" if match["status"] == "active" else "paused"
+            if wants_json():
+                return jsonify({"status": "success", "message": f"Match {status_text} successfully!", "data": match})
+            return f"""
+            <script>
+                window.location.href = '/admin/matches?message=Match {status_text} successfully!';
+            </script>
+            """
+        
+        if wants_json():
+            return jsonify({"status": "error", "message": "Match not found!"}), 404
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Match not found!';
+        </script>
+        """
+        
+    except Exception as e:
+        if wants_json():
+            return jsonify({"status": "error", "message": f"Error updating match: {e}"}), 500
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Error updating match: {str(e)}';
+        </script>
+        """
+
+@bp.route("/admin/matches/settle/<int:match_id>", methods=["POST"])
+def settle_match(match_id):
+    """Record a match result (won, lost, void, or empty to unsettle); JSON clients get the row back"""
+    try:
+        match = services().predictions.settle(match_id, request.form.get("result") or None)
+        if match is not None:
+            message = f"Match settled as {match['result']}!" if match["result"] else "Match result cleared!"
+            if wants_json():
+                return jsonify({"status": "success", "message": message, "data": match})
+            return f"""
+            <script>
+                window.location.href = '/admin/matches?message={quote(message)}';
+            </script>
+            """
+        
+        if wants_json():
+            return jsonify({"status": "error", "message": "Match not found!"}), 404
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Match not found!';
+        </script>
+        """
+        
+    except ValueError as e:
+        if wants_json():
+            return jsonify({"status": "error", "message": str(e)}), 400
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error={quote(str(e))}';
+        </script>
+        """
+
+@bp.route("/admin/matches/delete/<int:match_id>", methods=["POST"])
+def delete_match(match_id):
+    """Delete a match; JSON clients get its id back"""
+    try:
+        # Remove match by primary key
+        if not services().predictions.delete(match_id):
+            if wants_json():
+                return jsonify({"status": "error", "message": "Match not found!"}), 404
+            return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Match not found!';
+        </script>
+        """
+        
+        if wants_json():
+            return jsonify({"status": "success", "message": "Match deleted successfully!", "data": {"id": match_id}})
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?message=Match deleted successfully!';
+        </script>
+        """
+        
+    except Exception as e:
+        if wants_json():
+            return jsonify({"status": "error", "message": f"Error deleting match: {e}"}), 500
+        return f"""
+        <script>
+            window.location.href = '/admin/matches?error=Error deleting match: {str(e)}';
+        </script>
+        """
+
+@bp.route("/admin/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    """Profiler settings and samples per route as JSON
+
+    POST enabled=true|false, sample_rate=0.05 and/or reset=true
+    (form fields or a JSON body) to change them for every worker.
+    """
+    profiler = current_app.extensions["profiler"]
+    if request.method == "POST":
+        options = request.get_json(silent=True) or request.form
+        flag = lambda name: str(options[name]).lower() in ("1", "true", "on", "yes") if name in options else None
+        try:
+            sample_rate = float(options["sample_rate"]) if "sample_rate" in options else None
+            profiler.store.configure(enabled=flag("enabled"), sample_rate=sample_rate)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"sample_rate: {e}"}), 400
+        if flag("reset"):
+            profiler.store.reset()
+    
+    return jsonify({
+        "status": "success",
+        "data": {
+            **profiler.store.settings(),
+            "routes": profiler.store.routes()
+        }
+    })
+
+@bp.route("/admin/profiler/flamegraph")
+def admin_profiler_flamegraph():
+    """Sampled stacks in folded format for flamegraph.pl or speedscope
+
+    ?route=<endpoint> limits it to one route; otherwise every route is
+    included with the route name as the root frame.
+    """
+    profiler = current_app.extensions["profiler"]
+    route = request.args.get("route")
+    filename = f"profile-{route or 'all'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+    return Response(profiler.store.folded(route), mimetype="text/plain", headers={
+        "Content-Disposition": f"attachment; filename={filename}"
+    })
+
+@bp.route("/admin")
+def admin():
+    # Track admin page visit
+    track_visitor('Admin')
+    
+    # Aggregated across all workers, recent visits (?recent=, default 10) newest first
+    try:
+        recent = recent_from(request.args)
+    except ValueError:
+        recent = 10
+    analytics = services().analytics
+    stats = analytics.summary(recent=recent)
+    
+    # Last 7 days and last 24 hours straight from the rollup buckets
+    now = datetime.now()
+    daily_stats = analytics.series(ALL_PAGES, 'day', now - DEFAULT_SPANS['day'], now)
+    hourly_stats = analytics.series(ALL_PAGES, 'hour', now - DEFAULT_SPANS['hour'], now)
+    today_visits = daily_stats[-1][1]
+    
+    return render_template(
+        "admin/dashboard.html",
+        total_visits=stats['total_visits'],
+        unique_visitors=stats['unique_visitors'],
+        today_visits=today_visits,
+        page_views=stats['page_views'],
+        unique_by_page=stats['unique_visitors_by_page'],
+        unique_by_day=stats['unique_visitors_by_day'],
+        recent_visits=stats['recent_visits'],
+        daily_stats=daily_stats,
+        hourly_stats=hourly_stats,
+        hourly_peak=max(count for _, count in hourly_stats) or 1
+    )
+
+@bp.route("/api/visitors")
+def api_visitors():
+    """API endpoint to get visitor statistics as JSON
+
+    ?recent= sets how many recent visits to include (default 10). With
+    any of from/to/granularity/page, also returns visit counts per
+    bucket, e.g. /api/visitors?granularity=hour&from=2025-06-10&page=Home
+    """
+    try:
+        recent = recent_from(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    analytics = services().analytics
+    data = analytics.summary(recent=recent)
+    
+    if request.args.keys() & {'from', 'to', 'granularity', 'page'}:
+        try:
+            granularity = request.args.get('granularity', 'day')
+            if granularity not in DEFAULT_SPANS:
+                raise ValueError(f"granularity must be one of {', '.join(DEFAULT_SPANS)}")
+            end = parse_moment(request.args['to'], end_of_day=True) if 'to' in request.args else datetime.now()
+            start = parse_moment(request.args['from']) if 'from' in request.args else end - DEFAULT_SPANS[granularity]
+            page = request.args.get('page', ALL_PAGES)
+            data['series'] = {
+                "page": page,
+                "granularity": granularity,
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "buckets": [
+                    {"start": label, "visits": count}
+                    for label, count in analytics.series(page, granularity, start, end)
+                ]
+            }
+        except (ValueError, OverflowError) as e:
+            # OverflowError: a range running past year 1 or 9999
+            return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return jsonify({
+        "status": "success",
+        "data": data,
+        "last_updated": datetime.now().isoformat()
+    })
+
+@bp.route("/api/visitors/history")
+def api_visitors_history():
+    """Stream logged visits as NDJSON, a page at a time
+
+    ?cursor= (a sequence number), ?limit= and ?order=asc|desc, see
+    visitlog.history_args_from. Each line is one visit with its seq;
+    X-Next-Cursor gives the cursor of the following page and is left
+    out once a descending walk reaches the oldest visit kept.
+    """
+    try:
+        args = history_args_from(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    visits, next_cursor = services().analytics.history(**args)
+    headers = {"Cache-Control": "no-store"}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return Response(bulk.export_ndjson(visits, dumps=current_app.json.dumps_compact),
+                    mimetype=bulk.FORMATS["ndjson"], headers=headers)
+
+def parse_moment(value, end_of_day=False):
+    """ISO date or datetime from a query parameter, as naive local time"""
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"invalid date/time {value!r}, expected ISO 8601")
+    if moment.tzinfo is not None:
+        # Buckets follow local wall-clock time, see rollups.py
+        moment = moment.astimezone().replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        # A bare 'to' date includes the whole day
+        moment += timedelta(days=1, seconds=-1)
+    return moment
@@ -0,0 +1,440 @@
+"""Visitor analytics backends.
+
+track_visitor() only puts the raw page view on a bounded queue
+(AsyncRecorder); a background thread formats the visits and hands them
+to a backend in batches, so analytics never adds to request latency.
+When the queue is full new visits are shed and counted as dropped
+rather than blocking the request.
+
+The default SQLite backend keeps the counters in one file shared by all
+gunicorn workers, so /admin and /api/visitors report the same totals
+whichever worker answers. Unique visitors are HyperLogLog sketches
+(hll.py) kept overall, per day and per page: 16 KB each no matter how
+many IPs are seen, with a standard error of 0.81%. Visit counts over
+time are kept per page in minute/hour/day rollups (rollups.py) and can
+be queried by range. Every visit is also appended to an on-disk log
+(visitlog.py) that keeps history for /api/visitors/history. The memory
+backend keeps the old per-process behaviour and is handy for tests and
+single-process development.
+
+Choose one with the SUREBET_ANALYTICS environment variable
+("sqlite" or "memory").
+"""
+import logging
+import os
+import queue
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+
+from background import PerProcessThread
+from counters import ShardedCounter
+from hll import HyperLogLog, position
+from rollups import ALL_PAGES, RING_TIERS, MemoryRollups, RingSeries, bucket_batch, bucket_keys
+from store import SQLiteDatabase
+from visitlog import DEFAULT_LOG_DIR, VisitLog
+
+DEFAULT_ANALYTICS_PATH = os.environ.get(
+    "SUREBET_ANALYTICS_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics.db")
+)
+
+# How many visits the memory backend's visitor log keeps
+VISIT_LOG_SIZE = 100
+
+# How many recent days summary() reports daily visits and uniques for
+SUMMARY_DAYS = 30
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Counters in this process only - every worker has its own numbers
+
+    Only the analytics writer thread records visits, in batches, so one
+    lock around each batch guards everything here.
+    """
+
+    def __init__(self, log_size=VISIT_LOG_SIZE):
+        self.log_size = log_size
+        self.total_visits = 0
+        self.unique_visitors = HyperLogLog()
+        self.unique_by_day = defaultdict(HyperLogLog)
+        self.unique_by_page = defaultdict(HyperLogLog)
+        self.page_views = Counter()
+        self.rollups = MemoryRollups()
+        self.visit_log = deque(maxlen=log_size)
+        self.logged = 0  # visits ever added to visit_log
+        self._lock = threading.Lock()
+
+    def record(self, visit):
+        self.record_batch([visit])
+
+    def record_batch(self, visits):
+        with self._lock:
+            self.total_visits += len(visits)
+            self.page_views.update(visit['page'] for visit in visits)
+            # Drops the oldest entries past maxlen
+            self.visit_log.extend(visits)
+            self.logged += len(visits)
+            for visit in visits:
+                date = visit['timestamp'][:10]
+                self.unique_visitors.add(visit['ip'])
+                self.unique_by_day[date].add(visit['ip'])
+                self.unique_by_page[visit['page']].add(visit['ip'])
+            self.rollups.add_batch(visits)
+
+    def summary(self, recent=10):
+        with self._lock:
+            days = sorted(self.unique_by_day)[-SUMMARY_DAYS:]
+            daily_stats = self.rollups.days.get(ALL_PAGES, {})
+            return {
+                "total_visits": self.total_visits,
+                "unique_visitors": self.unique_visitors.count(),
+                "unique_visitors_by_day": {day: self.unique_by_day[day].count() for day in days},
+                "unique_visitors_by_page": {
+                    page: sketch.count() for page, sketch in self.unique_by_page.items()
+                },
+                "page_views": dict(self.page_views),
+                "daily_stats": {day: daily_stats[day] for day in sorted(daily_stats)[-SUMMARY_DAYS:]},
+                "recent_visits": list(self.visit_log)[-recent:][::-1] if recent else [],
+            }
+
+    @staticmethod
+    def _public(visit, seq):
+        return {**{key: visit[key] for key in ("ip", "user_agent", "timestamp", "page")}, "seq": seq}
+
+    def history(self, cursor=None, limit=1000, descending=False):
+        """Like VisitLog.page, over the visits this process still holds"""
+        with self._lock:
+            visits, end = list(self.visit_log), self.logged
+        first = end - len(visits)
+        if descending:
+            stop = end if cursor is None else min(cursor, end)
+            start = max(stop - limit, first)
+            page = [self._public(visits[seq - first], seq) for seq in range(stop - 1, start - 1, -1)]
+            return page, (start if start > first else None)
+        start = first if cursor is None else max(cursor, first)
+        stop = min(start + limit, end)
+        return [self._public(visits[seq - first], seq) for seq in range(start, stop)], max(start, stop)
+
+    def series(self, page, granularity, start, end):
+        with self._lock:
+            return self.rollups.series(page, granularity, start, end)
+
+    def page_view_counts(self):
+        with self._lock:
+            return dict(self.page_views)
+
+
+ANALYTICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_views (
+    page TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ring_rollups (
+    page TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    buckets BLOB NOT NULL,
+    counts BLOB NOT NULL,
+    PRIMARY KEY (page, granularity)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    page TEXT NOT NULL,
+    date TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (page, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS visitor_sketches (
+    scope TEXT PRIMARY KEY,
+    registers BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteBackend(SQLiteDatabase):
+    """Counters in a SQLite file shared by every worker process
+
+    Visits themselves go to an append-only VisitLog (visitlog.py) next to it.
+    """
+
+    def __init__(self, path=DEFAULT_ANALYTICS_PATH, log_dir=DEFAULT_LOG_DIR):
+        super().__init__(path)
+        self.visit_log = VisitLog(log_dir)
+        self._connection().executescript(ANALYTICS_SCHEMA)
+        self._migrate_unique_ips()
+        self._migrate_daily_stats()
+        self._migrate_visit_log()
+
+    def _migrate_visit_log(self):
+        """Move the old capped visit_log table into the log files"""
+        with self.transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'visit_log'"
+            ).fetchone()
+            if exists:
+                self.visit_log.append(
+                    {**row, "time": datetime.strptime(row["timestamp"], '%Y-%m-%d %H:%M:%S').timestamp()}
+                    for row in map(dict, conn.execute(
+                        "SELECT ip, user_agent, timestamp, page FROM visit_log ORDER BY id"
+                    ))
+                )
+                conn.execute("DROP TABLE visit_log")
+
+    def _migrate_daily_stats(self):
+        """Move the old site-wide daily_stats table into the day tier"""
+        with self.transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_stats'"
+            ).fetchone()
+            if exists:
+                conn.execute(
+                    "INSERT OR IGNORE INTO daily_rollups (page, date, count) "
+                    "SELECT ?, date, count FROM daily_stats", (ALL_PAGES,)
+                )
+                conn.execute("DROP TABLE daily_stats")
+
+    def _migrate_unique_ips(self):
+        """Fold the old raw-IP table into the overall sketch, then drop it"""
+        with self.transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'unique_visitors'"
+            ).fetchone()
+            if exists:
+                positions = {}
+                for (ip,) in conn.execute("SELECT ip FROM unique_visitors"):
+                    index, rank = position(ip)
+                    positions[index] = max(rank, positions.get(index, 0))
+                self._merge_sketches(conn, {"all": positions})
+                conn.execute("DROP TABLE unique_visitors")
+
+    def _merge_sketches(self, conn, sketches):
+        """Apply {scope: {index: rank}} to the stored sketches"""
+        for scope, positions in sketches.items():
+            row = conn.execute(
+                "SELECT registers FROM visitor_sketches WHERE scope = ?", (scope,)
+            ).fetchone()
+            sketch = HyperLogLog.from_bytes(row[0]) if row else HyperLogLog()
+            sketch.update(positions)
+            conn.execute(
+                "INSERT OR REPLACE INTO visitor_sketches (scope, registers) VALUES (?, ?)",
+                (scope, sketch.to_bytes())
+            )
+
+    def _load_ring(self, conn, page, granularity):
+        row = conn.execute(
+            "SELECT buckets, counts FROM ring_rollups WHERE page = ? AND granularity = ?",
+            (page, granularity)
+        ).fetchone()
+        width, size = RING_TIERS[granularity]
+        return RingSeries(width, size, *row) if row else RingSeries(width, size)
+
+    def _merge_rollups(self, conn, rollups):
+        """Apply bucket_batch() output: ring blobs read-modify-write, days upserted"""
+        rings = {}
+        days = []
+        for (page, granularity, key), count in rollups.items():
+            if granularity == "day":
+                days.append((page, key, count))
+                continue
+            ring = rings.get((page, granularity))
+            if ring is None:
+                ring = rings[page, granularity] = self._load_ring(conn, page, granularity)
+            ring.add(key, count)
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO ring_rollups (page, granularity, buckets, counts) "
+            "VALUES (?, ?, ?, ?)",
+            [(page, granularity, *ring.to_bytes()) for (page, granularity), ring in rings.items()]
+        )
+        conn.executemany(
+            "INSERT INTO daily_rollups (page, date, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (page, date) DO UPDATE SET count = count + excluded.count",
+            days
+        )
+
+    def _sketch_counts(self, conn, prefix, limit=-1):
+        """Estimates for the last `limit` sketches whose scope starts with `prefix`"""
+        rows = conn.execute(
+            "SELECT scope, registers FROM visitor_sketches WHERE scope LIKE ? "
+            "ORDER BY scope DESC LIMIT ?", (prefix + "%", limit)
+        ).fetchall()
+        return {
+            scope[len(prefix):]: HyperLogLog.from_bytes(registers).count()
+            for scope, registers in reversed(rows)
+        }
+
+    def record(self, visit):
+        self.record_batch([visit])
+
+    def record_batch(self, visits):
+        """Fold a batch of visits into the counters in one transaction"""
+        page_views = Counter(visit['page'] for visit in visits)
+        rollups = bucket_batch(visits)
+
+        # Only the registers this batch touches, per sketch
+        sketches = defaultdict(dict)
+        for visit in visits:
+            index, rank = position(visit['ip'])
+            for scope in ("all", "day:" + visit['timestamp'][:10], "page:" + visit['page']):
+                positions = sketches[scope]
+                if rank > positions.get(index, 0):
+                    positions[index] = rank
+
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO page_views (page, count) VALUES (?, ?) "
+                "ON CONFLICT (page) DO UPDATE SET count = count + excluded.count",
+                page_views.items()
+            )
+            self._merge_rollups(conn, rollups)
+            self._merge_sketches(conn, sketches)
+        self.visit_log.append(visits)
+
+    def summary(self, recent=10):
+        conn = self._connection()
+        page_views = dict(conn.execute("SELECT page, count FROM page_views").fetchall())
+        return {
+            # Every visit lands on exactly one page
+            "total_visits": sum(page_views.values()),
+            "unique_visitors": self._sketch_counts(conn, "all").get("", 0),
+            "unique_visitors_by_day": self._sketch_counts(conn, "day:", SUMMARY_DAYS),
+            "unique_visitors_by_page": self._sketch_counts(conn, "page:"),
+            "page_views": page_views,
+            "daily_stats": dict(reversed(conn.execute(
+                "SELECT date, count FROM daily_rollups WHERE page = ? ORDER BY date DESC LIMIT ?",
+                (ALL_PAGES, SUMMARY_DAYS)
+            ).fetchall())),
+            "recent_visits": self.visit_log.tail(recent),
+        }
+
+    def history(self, cursor=None, limit=1000, descending=False):
+        """(visits iterator, next cursor), see VisitLog.page"""
+        return self.visit_log.page(cursor, limit, descending)
+
+    def page_view_counts(self):
+        """{page: views}, a single small read for live updates"""
+        return dict(self._connection().execute("SELECT page, count FROM page_views").fetchall())
+
+    def series(self, page, granularity, start, end):
+        """[(bucket label, visits)] for `page` between two datetimes"""
+        keys = bucket_keys(granularity, start, end)
+        conn = self._connection()
+        if granularity == "day":
+            days = dict(conn.execute(
+                "SELECT date, count FROM daily_rollups WHERE page = ? AND date BETWEEN ? AND ?",
+                (page, keys[0][1], keys[-1][1])
+            ).fetchall()) if keys else {}
+            return [(label, days.get(key, 0)) for label, key in keys]
+        ring = self._load_ring(conn, page, granularity)
+        return [(label, ring.get(key)) for label, key in keys]
+
+
+class AsyncRecorder:
+    """Bounded visit queue drained by a background writer thread.
+
+    `track()` is all that runs on the request path: one non-blocking put
+    of the raw values. The writer blocks for the first visit, then takes
+    up to `batch_size` more and writes them with `record_batch()`.
+    """
+
+    def __init__(self, backend, max_queue=10000, batch_size=500):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.dropped = ShardedCounter()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = PerProcessThread(self._run, "analytics-writer", setup=self._reset, at_exit=self.close)
+
+    def _reset(self):
+        # Visits queued in the parent process are its to write
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+
+    def track(self, ip, user_agent, timestamp, page):
+        """Queue one page view; `timestamp` is a time.time() value"""
+        self._writer.ensure()
+        try:
+            self._queue.put_nowait((ip, user_agent, timestamp, page))
+        except queue.Full:
+            # Shed load instead of making the request wait
+            self.dropped.add()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while item is not None and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            visits = [
+                {
+                    'ip': ip,
+                    'user_agent': user_agent,
+                    'timestamp': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+                    'page': page,
+                    'time': ts
+                }
+                for ip, user_agent, ts, page in filter(None, batch)
+            ]
+            try:
+                if visits:
+                    self.backend.record_batch(visits)
+            except Exception:
+                # Losing a batch is better than losing the writer thread
+                logger.exception("Failed to record %d visits", len(visits))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def flush(self):
+        """Block until every queued visit has been written"""
+        if self._writer.started():
+            self._queue.join()
+
+    def close(self, timeout=5.0):
+        """Write what is queued and stop the writer (runs at exit)"""
+        if not self._writer.started() or not self._writer.thread.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.thread.join(timeout)
+
+    def summary(self, recent=10):
+        stats = self.backend.summary(recent=recent)
+        stats["queued_visits"] = self._queue.qsize()
+        stats["dropped_visits"] = self.dropped.value()
+        return stats
+
+    def series(self, page, granularity, start, end):
+        return self.backend.series(page, granularity, start, end)
+
+    def history(self, cursor=None, limit=1000, descending=False):
+        return self.backend.history(cursor, limit, descending)
+
+    def page_view_counts(self):
+        return self.backend.page_view_counts()
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+def create_backend(name=None, **options):
+    """Build the backend named by `name` or $SUREBET_ANALYTICS"""
+    name = name or os.environ.get("SUREBET_ANALYTICS", "sqlite")
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown analytics backend {name!r}; choose from {sorted(BACKENDS)}")
+    return backend_class(**options)
+
+
+def create_recorder(name=None, **options):
+    """An AsyncRecorder in front of `create_backend(name, **options)`"""
+    return AsyncRecorder(create_backend(name, **options))
@@ -0,0 +1,108 @@
+"""The JSON API and the /api/live event stream."""
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from live import FULL_RETRY_AFTER
+from services import services
+from store import filters_from_args
+from surebets import surebet_args_from
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+@bp.route("/live")
+def api_live():
+    """Server-Sent Events stream of prediction (and, on the admin app, visitor) updates
+
+    ?topics= picks a comma-separated subset. Each client gets a
+    'snapshot' event first, then one event per change. A worker already
+    holding its limit of streams answers 503 with Retry-After.
+    """
+    live = services().live
+    try:
+        topics = live.topics_from(request.args.get("topics"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    subscription = live.subscribe(topics)
+    if subscription is None:
+        response = jsonify({"status": "error", "message": "Too many live clients, try again later"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(FULL_RETRY_AFTER)
+        return response
+    response = Response(live.stream(subscription, current_app.json.dumps_compact), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Stop nginx from buffering the stream
+        "X-Accel-Buffering": "no"
+    })
+    response.call_on_close(lambda: live.unsubscribe(subscription))
+    return response
+
+@bp.route("/cache")
+def api_cache():
+    """API endpoint to get page and API cache hit/miss counters as JSON"""
+    svc = services()
+    return jsonify({
+        "status": "success",
+        "data": {"pages": svc.page_cache.stats(), "api": svc.api_cache.stats()},
+        "last_updated": datetime.now().isoformat()
+    })
+
+@bp.route("/predictions")
+def api_predictions():
+    """API endpoint to get predictions as JSON
+
+    Optional filters: league, from, to, confidence, min_odds, max_odds;
+    fields= picks columns and limit/cursor page through the results.
+    """
+    svc = services()
+    updated_at = svc.predictions.updated_at()
+
+    def render():
+        rows, next_cursor = svc.predictions.query(**filters_from_args(request.args))
+        return jsonify({
+            "status": "success",
+            "data": rows,
+            "next_cursor": next_cursor,
+            "last_updated": updated_at.isoformat()
+        })
+
+    try:
+        # Each distinct query is serialized once per data version
+        return svc.api_cache.serve(render, last_modified=updated_at,
+                                   key=request.query_string)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@bp.route("/surebets")
+def api_surebets():
+    """Arbitrage opportunities across bookmakers, see surebets.py
+
+    Optional ?min_profit= (percent), ?bankroll= to get stake amounts and
+    ?market= (comma-separated). Cached per query until odds or
+    predictions change.
+    """
+    try:
+        args = surebet_args_from(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    svc = services()
+
+    def render():
+        found = svc.surebets.surebets(**args)
+        return jsonify({"status": "success", "count": len(found), "data": found})
+
+    return svc.api_cache.serve(render, last_modified=svc.predictions.updated_at(),
+                               key=request.query_string)
+
+@bp.route("/statistics")
+def api_statistics():
+    """API endpoint to get statistics as JSON, serialized once per data version"""
+    svc = services()
+    updated_at = svc.predictions.updated_at()
+    return svc.api_cache.serve(lambda: jsonify({
+        "status": "success",
+        "data": svc.statistics.api_data(),
+        "last_updated": updated_at.isoformat()
+    }), last_modified=updated_at)
@@ -0,0 +1,119 @@
+"""Fingerprinted, precompressed static assets.
+
+Every file under static/ is hashed at startup and served from
+/assets/<name>.<hash>.<ext> with a far-future immutable Cache-Control
+header. gzip (and brotli, when the package is installed) variants are
+built once in memory, so requests never compress anything.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, abort, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# One year - fingerprinted URLs change whenever the content does
+ASSET_MAX_AGE = 31536000
+
+
+def fingerprint(name, content):
+    """Return `name` with a content hash before its extension"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest}{ext}", digest
+
+
+def compress_variants(content):
+    """Precompressed bodies keyed by Content-Encoding"""
+    variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content, quality=11)
+    # Only keep encodings that actually save bytes
+    return {enc: body for enc, body in variants.items() if len(body) < len(content)}
+
+
+def preferred_encoding(available):
+    """The `available` encoding with the client's highest q-value, or None
+
+    brotli wins ties, being the smaller. None also when the client ranks
+    identity (e.g. through "*") above every encoding on offer.
+    """
+    accepted = request.accept_encodings
+    candidates = [encoding for encoding in ("br", "gzip")
+                  if encoding in available and accepted.quality(encoding) > 0]
+    if not candidates:
+        return None
+    best = max(candidates, key=accepted.quality)
+    if accepted.quality("identity") > accepted.quality(best):
+        return None
+    return best
+
+
+class AssetPipeline:
+    """Builds the asset manifest and serves fingerprinted files"""
+
+    def __init__(self, app=None, folder="static", url_prefix="/assets"):
+        self.folder = folder
+        self.url_prefix = url_prefix
+        self.manifest = {}  # logical name -> fingerprinted name
+        self.assets = {}    # fingerprinted name -> asset entry
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.build(os.path.join(app.root_path, self.folder))
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", "assets", self.serve)
+        app.jinja_env.globals["asset_url"] = self.url_for
+        app.extensions["assets"] = self
+
+    def build(self, root):
+        """Hash and precompress every file under `root`"""
+        self.manifest.clear()
+        self.assets.clear()
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    content = f.read()
+
+                hashed_name, digest = fingerprint(name, content)
+                mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                self.manifest[name] = hashed_name
+                self.assets[hashed_name] = {
+                    "body": content,
+                    "variants": compress_variants(content),
+                    "mimetype": mimetype,
+                    "etag": digest,
+                }
+
+    def url_for(self, name):
+        """URL of the fingerprinted copy of static/<name>"""
+        return f"{self.url_prefix}/{self.manifest[name]}"
+
+    def serve(self, filename):
+        asset = self.assets.get(filename)
+        if asset is None:
+            abort(404)
+
+        headers = {
+            "Cache-Control": f"public, max-age={ASSET_MAX_AGE}, immutable",
+            "Vary": "Accept-Encoding",
+            # Weak: the same tag covers the identity, gzip and br bodies
+            "ETag": f'W/"{asset["etag"]}"',
+        }
+        if request.if_none_match.contains_weak(asset["etag"]):
+            return Response(status=304, headers=headers)
+
+        body = asset["body"]
+        encoding = preferred_encoding(asset["variants"])
+        if encoding:
+            body = asset["variants"][encoding]
+            headers["Content-Encoding"] = encoding
+
+        return Response(body, mimetype=asset["mimetype"], headers=headers)
@@ -0,0 +1,51 @@
+"""Background threads that follow gunicorn's forks.
+
+Metrics, analytics, the live feed and the profiler are built before
+gunicorn forks its workers (with GUNICORN_PRELOAD=1, in the master) but
+each needs a thread of its own in every worker. PerProcessThread starts
+one lazily, the first time a process uses it.
+"""
+import atexit
+import os
+import threading
+
+
+class PerProcessThread:
+    """A daemon thread started on first use in each process
+
+    Threads do not survive fork, so whatever is built before gunicorn
+    forks calls ensure() on its request path and every worker starts its
+    own. `setup` runs first, under the lock, to drop state copied from the
+    parent; `at_exit` is registered once per process. With `restart` a
+    thread that has returned is started again by the next ensure().
+    """
+
+    def __init__(self, target, name, setup=None, at_exit=None, restart=False):
+        self.target = target
+        self.name = name
+        self.setup = setup
+        self.at_exit = at_exit
+        self.restart = restart
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _needed(self):
+        return self._pid != os.getpid() or (self.restart and not self.thread.is_alive())
+
+    def ensure(self):
+        if self._needed():
+            with self._lock:
+                if self._needed():
+                    if self.setup is not None:
+                        self.setup()
+                    self.thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+                    self.thread.start()
+                    if self._pid != os.getpid():
+                        self._pid = os.getpid()
+                        if self.at_exit is not None:
+                            atexit.register(self.at_exit)
+
+    def started(self):
+        """Whether this process has started its thread"""
+        return self._pid == os.getpid()
@@ -0,0 +1,11 @@
+"""gunicorn target for the admin app, whose source lives in admin.html.
+
+load.py serves it with `--pythonpath benchmarks admin_wsgi:app`; gunicorn
+has already changed into the checkout when this is imported.
+"""
+import importlib.machinery
+import os
+
+app = importlib.machinery.SourceFileLoader(
+    "admin_app", os.path.join(os.getcwd(), "admin.html")
+).load_module().app
@@ -0,0 +1,102 @@
+"""Shared helpers for the benchmark scripts: percentiles and JSON results.
+
+Every script saves the same shape, so compare.py can diff any two runs:
+
+    {"kind": ..., "meta": {commit, python, cpus, ...},
+     "params": {...}, "results": {route: {metric: value}}}
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Where the app keeps its data, each moved into a scratch directory by scratch_env()
+DATA_PATHS = {
+    "SUREBET_DB": "surebet.db",
+    "SUREBET_ANALYTICS_DB": "analytics.db",
+    "SUREBET_METRICS_DB": "metrics.db",
+    "SUREBET_PROFILE_DB": "profile.db",
+    "SUREBET_VISIT_LOG": "visits",
+}
+
+
+def scratch_env(prefix="surebet-bench-"):
+    """A copy of os.environ with every database in a new temporary directory
+
+    so a run never writes into the checkout it measures.
+    """
+    scratch = tempfile.mkdtemp(prefix=prefix)
+    env = dict(os.environ)
+    env.update((name, os.path.join(scratch, filename)) for name, filename in DATA_PATHS.items())
+    return env
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed=None, errors=0):
+    """Latency percentiles in milliseconds, plus req/s when `elapsed` is given"""
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "errors": errors,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+    if elapsed:
+        summary["rps"] = round(len(ordered) / elapsed, 1)
+    return summary
+
+
+def git_commit(chdir=PACKAGE_DIR):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=chdir,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, kind, params, results, chdir=PACKAGE_DIR):
+    """Write one run to `path` as JSON and return the document"""
+    document = {
+        "kind": kind,
+        "meta": {
+            "commit": git_commit(chdir),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "params": params,
+        "results": results,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def print_table(results, columns):
+    """Results as an aligned text table, one row per route"""
+    width = max([len("route")] + [len(route) for route in results])
+    print(f"  {'route':<{width}}  " + "  ".join(f"{column:>10}" for column in columns))
+    for route, metrics in results.items():
+        print(f"  {route:<{width}}  " + "  ".join(
+            f"{metrics.get(column, ''):>10}" for column in columns
+        ))
@@ -0,0 +1,47 @@
+"""Compare two benchmark result files route by route.
+
+    python benchmarks/compare.py before.json after.json
+
+Prints each metric's old and new value and the change in percent.
+Latencies are better when they go down, req/s when it goes up.
+"""
+import argparse
+import json
+
+# Metrics shown when present, in this order
+METRICS = ("rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old, new):
+    if not old:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    if before.get("kind") != after.get("kind"):
+        parser.error(f"cannot compare {before.get('kind')} results with {after.get('kind')} results")
+
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')} ({after['kind']})")
+    routes = [route for route in after["results"] if route in before["results"]]
+    width = max([len("route")] + [len(route) for route in routes])
+    for route in routes:
+        old, new = before["results"][route], after["results"][route]
+        cells = [
+            f"{metric} {old[metric]:g} -> {new[metric]:g} ({change(old[metric], new[metric])})"
+            for metric in METRICS if metric in old and metric in new
+        ]
+        print(f"  {route:<{width}}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
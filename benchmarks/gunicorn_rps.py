@@ -0,0 +1,112 @@
+"""Requests/sec for the public pages under gunicorn.
+
+Starts gunicorn on a free local port, hammers each page with a pool of
+client threads and prints the throughput. Point --chdir at another
+checkout (e.g. a `git worktree` of the previous commit) to get a
+before/after comparison:
+
+    python benchmarks/gunicorn_rps.py
+    python benchmarks/gunicorn_rps.py --chdir ../surebet-baseline
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import scratch_env
+
+DEFAULT_PATHS = ["/", "/predictions", "/statistics", "/about"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not start on port {port}")
+
+
+def fetch(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def measure(port, path, requests, concurrency):
+    # Warm up so template compilation and imports are not counted
+    for _ in range(concurrency):
+        fetch(port, path)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(lambda _: fetch(port, path), range(requests)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(1 for status in statuses if status != 200)
+    return requests / elapsed, errors
+
+
+def start_server(app, chdir, port, workers, worker_class="sync", threads=1, pythonpath=None):
+    """Launch gunicorn in the background on scratch databases; the caller terminates it"""
+    command = [
+        sys.executable, "-m", "gunicorn", app,
+        "--chdir", os.path.abspath(chdir),
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--worker-class", worker_class,
+        "--threads", str(threads),
+        "--log-level", "warning",
+    ]
+    if pythonpath:
+        command += ["--pythonpath", pythonpath]
+    return subprocess.Popen(command, env=scratch_env("surebet-server-"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app:app", help="gunicorn app target")
+    parser.add_argument("--chdir", default=".", help="checkout to serve from")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--worker-class", default="sync")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--path", action="append", dest="paths")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    server = start_server(args.app, args.chdir, port, args.workers,
+                          args.worker_class, args.threads)
+    try:
+        wait_until_ready(port)
+        print(f"{args.app} from {os.path.abspath(args.chdir)} "
+              f"({args.workers} {args.worker_class} workers x {args.threads} threads, "
+              f"{args.concurrency} clients)")
+        for path in args.paths or DEFAULT_PATHS:
+            rps, errors = measure(port, path, args.requests, args.concurrency)
+            print(f"  {path:<14} {rps:8.1f} req/s  errors={errors}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
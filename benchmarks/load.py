@@ -0,0 +1,109 @@
+"""Local load generator: latency percentiles and req/s under gunicorn.
+
+Starts gunicorn on a free local port, then for each route keeps
+--concurrency clients busy for --duration seconds, each reusing one
+keep-alive connection the way wrk does, and reports p50/p95/p99 latency
+and throughput. Nothing leaves the machine.
+
+    python benchmarks/load.py --output benchmarks/results/load.json
+    python benchmarks/load.py --admin --worker-class gthread --threads 4
+    python benchmarks/compare.py before.json benchmarks/results/load.json
+
+--admin serves admin.html instead of app.py and adds the admin routes.
+Databases are created in a temporary directory, never in the checkout.
+"""
+import argparse
+import http.client
+import os
+import threading
+import time
+
+from common import PACKAGE_DIR, print_table, save_results, summarize
+from gunicorn_rps import free_port, start_server, wait_until_ready
+from micro import ADMIN_ROUTES, PUBLIC_ROUTES
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def client_loop(port, path, deadline, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            status = None
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors.append(status)
+    conn.close()
+
+
+def run_route(port, path, duration, concurrency, warmup):
+    """Drive one route for `duration` seconds and summarize it"""
+    if warmup:
+        client_loop(port, path, time.perf_counter() + warmup, [], [])
+    latencies, errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    clients = [
+        threading.Thread(target=client_loop, args=(port, path, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return summarize(latencies, time.perf_counter() - started, len(errors))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chdir", default=PACKAGE_DIR, help="checkout to serve from")
+    parser.add_argument("--admin", action="store_true", help="serve and test the admin app")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--worker-class", default="sync")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per route")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+
+    if args.admin:
+        app, pythonpath = "admin_wsgi:app", BENCHMARK_DIR
+        paths = args.paths or PUBLIC_ROUTES + ADMIN_ROUTES
+    else:
+        app, pythonpath = "app:app", None
+        paths = args.paths or PUBLIC_ROUTES
+
+    port = free_port()
+    server = start_server(app, args.chdir, port, args.workers, args.worker_class,
+                          args.threads, pythonpath=pythonpath)
+    results = {}
+    try:
+        wait_until_ready(port)
+        print(f"{app} from {os.path.abspath(args.chdir)}: {args.workers} {args.worker_class} "
+              f"workers x {args.threads} threads, {args.concurrency} clients, "
+              f"{args.duration:g}s per route")
+        for path in paths:
+            results[path] = run_route(port, path, args.duration, args.concurrency, args.warmup)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_table(results, ["rps", "p50_ms", "p95_ms", "p99_ms", "errors"])
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ("output", "chdir")}
+        save_results(args.output, "load", params, results, os.path.abspath(args.chdir))
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
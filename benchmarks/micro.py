@@ -0,0 +1,102 @@
+"""Per-route render and serialize cost through Flask's test client.
+
+No server and no network: each route of the public app (app.py) and
+the admin app (admin.html) is called in-process and timed. "warm" runs
+are served from the page/API caches as in production; "cold" runs
+clear those caches before every request, so they measure template
+rendering, queries and JSON encoding.
+
+    python benchmarks/micro.py --output benchmarks/results/micro.json
+    python benchmarks/micro.py --chdir ../surebet-before --output before.json
+    python benchmarks/compare.py before.json benchmarks/results/micro.json
+
+Databases are created in a temporary directory, never in the checkout.
+"""
+import argparse
+import importlib.machinery
+import os
+import sys
+import time
+
+from common import PACKAGE_DIR, print_table, save_results, scratch_env, summarize
+
+PUBLIC_ROUTES = ["/", "/predictions", "/statistics", "/about",
+                 "/api/predictions", "/api/statistics"]
+ADMIN_ROUTES = ["/admin", "/admin/matches", "/api/visitors"]
+
+
+def load_apps(chdir):
+    """(public module, admin module) imported from the checkout at `chdir`"""
+    sys.path.insert(0, chdir)
+    os.chdir(chdir)
+    import app as public
+    admin = importlib.machinery.SourceFileLoader(
+        "admin_app", os.path.join(chdir, "admin.html")
+    ).load_module()
+    return public, admin
+
+
+def clear_caches(module):
+    services = module.app.extensions.get("services")
+    if services is not None:
+        caches = (services.page_cache, services.api_cache)
+    else:
+        # Checkouts from before the app factory keep them as module globals
+        caches = (getattr(module, name, None) for name in ("PAGE_CACHE", "API_CACHE"))
+    for cache in caches:
+        if cache is not None:
+            cache.bump()
+
+
+def time_route(module, path, iterations, cold):
+    client = module.app.test_client()
+    # Warm up imports, template compilation and the caches
+    for _ in range(10):
+        client.get(path)
+    latencies, errors = [], 0
+    for _ in range(iterations):
+        if cold:
+            clear_caches(module)
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors += 1
+    services = module.app.extensions.get("services")
+    analytics = services.analytics if services is not None else getattr(module, "ANALYTICS", None)
+    if hasattr(analytics, "flush"):
+        # Do not let queued visits spill into the next route's timings
+        analytics.flush()
+    return summarize(latencies, errors=errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chdir", default=PACKAGE_DIR, help="checkout to import the apps from")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+    chdir = os.path.abspath(args.chdir)
+    output = os.path.abspath(args.output) if args.output else None
+
+    os.environ.update(scratch_env())
+    public, admin = load_apps(chdir)
+
+    results = {}
+    for label, module, paths in [("public", public, PUBLIC_ROUTES),
+                                 ("admin", admin, PUBLIC_ROUTES + ADMIN_ROUTES)]:
+        for path in paths:
+            for mode in ("warm", "cold"):
+                results[f"{label} {path} {mode}"] = time_route(
+                    module, path, args.iterations, cold=(mode == "cold")
+                )
+
+    print(f"{args.iterations} requests per route from {chdir}")
+    print_table(results, ["mean_ms", "p50_ms", "p95_ms", "p99_ms", "errors"])
+    if output:
+        save_results(output, "micro", {"iterations": args.iterations}, results, chdir)
+        print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""How throughput scales with gunicorn workers and threads.
+
+Runs gunicorn_rps against each worker count in turn and prints a
+Markdown table of req/s per route, ready to paste into the README:
+
+    python benchmarks/scaling.py --workers 1,2,4 --worker-class gthread --threads 4
+    python benchmarks/scaling.py --workers 1,2,4 --worker-class sync
+
+Throughput should grow roughly linearly with workers up to the number
+of cores (`os.cpu_count()` is printed with the results) and flatten
+beyond it.
+"""
+import argparse
+import os
+
+from gunicorn_rps import DEFAULT_PATHS, free_port, measure, start_server, wait_until_ready
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app:app", help="gunicorn app target")
+    parser.add_argument("--chdir", default=".", help="checkout to serve from")
+    parser.add_argument("--workers", default="1,2,4",
+                        help="comma-separated worker counts to try")
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--path", action="append", dest="paths")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or DEFAULT_PATHS
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    print(f"{args.app}: {args.worker_class} workers x {args.threads} threads, "
+          f"{args.concurrency} clients, {os.cpu_count()} CPUs\n")
+    print("| Workers | " + " | ".join(f"`{path}`" for path in paths) + " |")
+    print("|--------:|" + "|".join("-" * (len(path) + 3) + ":" for path in paths) + "|")
+
+    for workers in worker_counts:
+        port = free_port()
+        server = start_server(args.app, args.chdir, port, workers,
+                              args.worker_class, args.threads)
+        try:
+            wait_until_ready(port)
+            results = []
+            for path in paths:
+                rps, errors = measure(port, path, args.requests, args.concurrency)
+                results.append(f"{rps:.0f}" + (f" ({errors} errors)" if errors else ""))
+            print(f"| {workers} | " + " | ".join(results) + " |", flush=True)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
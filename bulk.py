@@ -0,0 +1,116 @@
+"""CSV and NDJSON import/export of predictions.
+
+Imports are parsed and validated row by row: good rows are returned for
+a single-transaction insert and bad ones come back as per-line errors,
+so one typo does not reject a whole matchday. Exports are generators
+that yield the document in chunks while rows are read from the store.
+"""
+import csv
+import io
+import json
+
+from models import Prediction
+from store import COLUMNS
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Largest upload accepted in one request
+MAX_IMPORT_ROWS = 10000
+
+# Flush export output once this many characters are buffered
+EXPORT_CHUNK_SIZE = 16384
+
+
+def guess_format(filename="", mimetype=""):
+    """'csv' or 'ndjson' from an upload's name or content type, else None"""
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("csv", "ndjson", "jsonl"):
+        return "csv" if extension == "csv" else "ndjson"
+    for fmt, fmt_mimetype in FORMATS.items():
+        if mimetype == fmt_mimetype:
+            return fmt
+    return None
+
+
+def validate_row(row):
+    """A prediction dict ready for PredictionStore.add_many, or ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    return Prediction.parse(row).to_row()
+
+
+def _csv_records(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise ValueError("CSV upload has no header row")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _ndjson_records(text):
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def parse_upload(data, fmt):
+    """(valid rows, errors) from an uploaded CSV or NDJSON document.
+
+    Each error is {"line": n, "error": message}. Raises ValueError when
+    the upload as a whole is unusable.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("upload is not UTF-8 text")
+
+    records = _csv_records(text) if fmt == "csv" else _ndjson_records(text)
+    rows, errors = [], []
+    for count, (line_number, record) in enumerate(records, 1):
+        if count > MAX_IMPORT_ROWS:
+            raise ValueError(f"at most {MAX_IMPORT_ROWS} rows per upload")
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f"invalid JSON: {record}")
+            rows.append(validate_row(record))
+        except ValueError as e:
+            errors.append({"line": line_number, "error": str(e)})
+    return rows, errors
+
+
+def export_csv(rows, columns=COLUMNS):
+    """Yield a CSV document for `rows` in chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(rows, dumps=json.dumps):
+    """Yield one JSON object per line for `rows`, in chunks"""
+    chunk = []
+    size = 0
+    for row in rows:
+        line = dumps(row) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield "".join(chunk)
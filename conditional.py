@@ -0,0 +1,29 @@
+"""Conditional GET helpers (ETag / Last-Modified -> 304 Not Modified)"""
+from datetime import timezone
+
+from flask import request
+
+
+def http_date(moment):
+    """Naive local datetimes from datetime.now() as aware UTC"""
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.astimezone(timezone.utc)
+
+
+def make_conditional(response, etag=None, last_modified=None):
+    """Tag `response` and turn it into a 304 if the client copy is current.
+
+    Without an explicit `etag` one is derived from the body, so the body
+    must not contain anything that changes per request.
+    """
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = http_date(last_modified)
+    # Clients and CDNs may store the response but must revalidate it
+    response.cache_control.no_cache = True
+    response.cache_control.public = True
+    return response.make_conditional(request)
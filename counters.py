@@ -0,0 +1,67 @@
+"""Counters that threaded workers can bump without a shared lock.
+
+Every thread increments its own shard, which no other thread writes,
+so `+=` on it can never lose an update. Reads add the shards up. The
+lock is only taken the first time a thread touches a counter, to
+register its shard, never on an ordinary increment.
+"""
+import threading
+
+
+class ShardedCounter:
+    """An exact integer count with one shard per thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0]
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def add(self, amount=1):
+        self._shard()[0] += amount
+
+    def value(self):
+        with self._lock:
+            shards = list(self._shards)
+        return sum(shard[0] for shard in shards)
+
+
+class ShardedCounters:
+    """Exact per-key counts (e.g. per page) with one dict per thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def add(self, key, amount=1):
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def snapshot(self):
+        """{key: total} over every thread"""
+        with self._lock:
+            # dict.copy() is a single step, so a shard growing meanwhile is safe
+            shards = [shard.copy() for shard in self._shards]
+        totals = {}
+        for shard in shards:
+            for key, count in shard.items():
+                totals[key] = totals.get(key, 0) + count
+        return totals
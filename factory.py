@@ -0,0 +1,95 @@
+"""Application factory for the public site and the admin app.
+
+create_app() builds everything an app needs - stores, caches, engines,
+fingerprinted assets and compiled templates - once, so a gunicorn worker
+pays for it at startup rather than on its first requests. With
+GUNICORN_PRELOAD=1 the master builds the app before forking and workers
+share that work copy-on-write; SQLite connections and background
+threads are per process and opened lazily after the fork.
+
+Views live in three blueprints, so endpoint names (used by /metrics,
+the profiler and url_for) are "public.home", "api.api_predictions",
+"admin.admin_matches" and so on.
+"""
+import logging
+import os
+import time
+
+from flask import Flask
+
+import admin_views
+import api_views
+import public_views
+from analytics import DEFAULT_ANALYTICS_PATH
+from assets import AssetPipeline
+from compression import Compression
+from json_provider import FastJSONProvider
+from live import default_max_clients
+from metrics import DEFAULT_METRICS_PATH, Metrics, MetricsStore
+from profiler import DEFAULT_PROFILE_PATH, ProfileStore, SamplingProfiler
+from services import Services
+from store import DEFAULT_DB_PATH
+from templating import precompile_templates
+from visitlog import DEFAULT_LOG_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    # The admin app adds the admin blueprint and visitor tracking
+    "ADMIN": False,
+    "SECRET_KEY": os.environ.get("SECRET_KEY", "your-secret-key-change-this-in-production"),
+    "SUREBET_DB": DEFAULT_DB_PATH,
+    "SUREBET_ANALYTICS": os.environ.get("SUREBET_ANALYTICS", "sqlite"),
+    "SUREBET_ANALYTICS_DB": DEFAULT_ANALYTICS_PATH,
+    "SUREBET_VISIT_LOG": DEFAULT_LOG_DIR,
+    "SUREBET_METRICS_DB": DEFAULT_METRICS_PATH,
+    "SUREBET_PROFILE_DB": DEFAULT_PROFILE_PATH,
+    # Open /api/live streams per worker (None: no cap), see live.py
+    "LIVE_MAX_CLIENTS": default_max_clients(),
+    # Load predictions and odds at startup instead of on the first request
+    "WARM_CACHES": True,
+}
+
+
+def create_app(config=None):
+    """A configured app; `config` overrides keys of DEFAULT_CONFIG"""
+    started = time.perf_counter()
+    # static/ is served fingerprinted by AssetPipeline, not Flask's /static route
+    app = Flask(__name__, static_folder=None)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.update(config or {})
+
+    services = Services(app.config)
+    services.init_app(app)
+
+    # orjson-backed jsonify when orjson is installed, see json_provider.py
+    app.json = FastJSONProvider(app)
+
+    # Request latency, size and phase timings at /metrics, see metrics.py
+    Metrics(app, store=MetricsStore(app.config["SUREBET_METRICS_DB"]))
+
+    # Opt-in stack sampling of live requests, controlled from /admin/profiler
+    SamplingProfiler(app, store=ProfileStore(app.config["SUREBET_PROFILE_DB"]))
+
+    # gzip/brotli for responses the caches do not precompress, see compression.py
+    Compression(app)
+
+    # Stylesheets are served fingerprinted from /assets, see assets.py
+    AssetPipeline(app)
+
+    app.register_blueprint(public_views.bp)
+    app.register_blueprint(api_views.bp)
+    if app.config["ADMIN"]:
+        app.register_blueprint(admin_views.bp)
+
+    # Page templates live in templates/ and extend templates/base.html
+    app.jinja_env.globals["admin_nav"] = app.config["ADMIN"]
+    precompile_templates(app)
+
+    if app.config["WARM_CACHES"]:
+        services.warm()
+
+    app.config["STARTUP_SECONDS"] = time.perf_counter() - started
+    logger.info("Built %s app in %.0f ms (pid %d)", "admin" if app.config["ADMIN"] else "public",
+                app.config["STARTUP_SECONDS"] * 1000, os.getpid())
+    return app
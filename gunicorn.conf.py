@@ -0,0 +1,80 @@
+"""Production gunicorn settings.
+
+gunicorn reads this file automatically when started from this directory
+(the Procfile also names it). Every knob can be overridden from the
+environment without editing it:
+
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=8 gunicorn app:app
+
+Workers are threaded (gthread) by default. That is not for speed:
+cached pages are CPU-bound, and in the README's scaling runs gthread x4
+serves 10-25% fewer requests per second than sync workers. It is so
+that a worker holding an admin /api/live stream, a slow client or an
+idle keep-alive connection still answers other requests on its
+remaining GUNICORN_THREADS - 1 threads; a sync worker would be stuck.
+/api/live takes at most that many streams per worker (see live.py) and
+public pages open none. For many live clients use
+GUNICORN_WORKER_CLASS=gevent (pip install gevent), which lifts the cap.
+For the most throughput without live streams, use
+GUNICORN_WORKER_CLASS=sync; /api/live then answers 503 and the admin
+dashboard keeps its server-rendered counters.
+
+Reload code or settings without dropping requests with
+`kill -HUP <master pid>`: new workers start, and old ones finish the
+requests they have within graceful_timeout before exiting.
+
+Each worker builds the app once at startup (see factory.py) and logs how
+long it took. GUNICORN_PRELOAD=1 builds it once in the master instead,
+and workers share the loaded code, compiled templates and warmed caches
+copy-on-write. That makes workers start faster and use less memory, but
+HUP then reloads settings only; restart the master to load new code.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# Processes; one per core keeps every core busy, the extra one covers
+# a worker that is restarting
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# Concurrent requests per gthread worker; gunicorn turns sync workers
+# with more than one thread into gthread, so sync defaults to one
+threads = int(os.environ.get("GUNICORN_THREADS", "1" if worker_class == "sync" else "4"))
+# Concurrent connections per gevent/eventlet worker
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers after this many requests (0 = never), jittered so
+# they do not all restart together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "50"))
+
+# Build the app in the master and fork workers from it
+preload_app = os.environ.get("GUNICORN_PRELOAD", "").lower() in ("1", "true", "yes")
+
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+
+
+def when_ready(server):
+    server.log.info("Serving with %d %s workers x %d threads",
+                    workers, worker_class, threads)
+    if preload_app:
+        app = server.app.wsgi()
+        server.log.info("Preloaded the app in %.0f ms", app.config["STARTUP_SECONDS"] * 1000)
+        # Move everything loaded so far out of the collector's reach, so
+        # collections in the workers do not touch (and copy) shared pages
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if preload_app:
+        worker.log.info("Worker %d forked from the preloaded app", worker.pid)
+    else:
+        worker.log.info("Worker %d built the app in %.0f ms",
+                        worker.pid, worker.wsgi.config["STARTUP_SECONDS"] * 1000)
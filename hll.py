@@ -0,0 +1,73 @@
+"""HyperLogLog cardinality sketch for unique-visitor counts.
+
+A sketch is a fixed array of 2**p one-byte registers, whatever the
+traffic. With the default p=14 that is 16 KB per sketch and a standard
+error of 1.04 / sqrt(2**14) = 0.81%, i.e. about 95% of estimates land
+within 1.6% of the true count. Sketches merge by taking the register
+maximum, so per-worker or per-batch sketches combine losslessly.
+"""
+import hashlib
+import math
+
+DEFAULT_PRECISION = 14
+
+
+def position(value, p=DEFAULT_PRECISION):
+    """(register index, rank) that `value` maps to"""
+    x = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+    index = x >> (64 - p)
+    rest = x & ((1 << (64 - p)) - 1)
+    # Position of the leftmost 1-bit in the remaining 64 - p bits
+    return index, (64 - p) - rest.bit_length() + 1
+
+
+class HyperLogLog:
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p=DEFAULT_PRECISION, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError(f"expected {self.m} registers, got {len(self.registers)}")
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(p=len(data).bit_length() - 1, registers=data)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        index, rank = position(value, self.p)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, positions):
+        """Apply {index: rank} pairs, e.g. a batch collected with position()"""
+        registers = self.registers
+        for index, rank in positions.items():
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.m
+        registers = self.registers
+        # Registers hold small ranks, so sum 2**-rank per distinct value
+        harmonic = sum(registers.count(rank) * 2.0 ** -rank for rank in range(66 - self.p))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / harmonic
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
@@ -0,0 +1,67 @@
+"""Flask JSON provider backed by orjson when it is installed.
+
+orjson serializes several times faster than the stdlib encoder and
+returns bytes, which go straight into the response body. Output matches
+Flask's default provider: sorted keys, compact separators in responses,
+and dates, decimals and dataclasses converted by the same `default`
+hook. dumps() takes the fast path only when asked for compact
+separators (dumps_compact()), since Flask's default dumps() separates
+with ", " and ": ". orjson always writes UTF-8, so with `ensure_ascii`
+on (Flask's default) output containing non-ASCII text is encoded again
+by the stdlib encoder to get the \\uXXXX escapes; ASCII-only output, the
+common case, is kept as is. Anything orjson refuses (e.g. integers over
+64 bits) also falls back to the stdlib encoder, as does everything when
+orjson is missing.
+
+Parsing stays with the stdlib: orjson reads integers over 64 bits as
+floats and rejects NaN, both of which request.get_json() accepts.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder always works
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with an orjson fast path"""
+
+    def _options(self, indent=False):
+        # Leave datetimes to `default` so they render as HTTP dates, like Flask
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, indent=False):
+        """UTF-8 JSON for `obj`"""
+        if orjson is not None:
+            try:
+                data = orjson.dumps(obj, default=self.default, option=self._options(indent))
+            except TypeError:
+                pass
+            else:
+                if not self.ensure_ascii or data.isascii():
+                    return data
+        kwargs = {"indent": 2} if indent else {"separators": (",", ":")}
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        # Only compact output is orjson's; Flask's default has ", " and ": "
+        if orjson is None or kwargs != {"separators": (",", ":")}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_compact(self, obj):
+        """Compact one-line JSON str, e.g. for NDJSON lines and SSE events"""
+        return self.dumps(obj, separators=(",", ":"))
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype
+        )
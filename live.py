@@ -0,0 +1,230 @@
+"""Server-Sent Events feed of prediction and visitor updates.
+
+Each worker process runs one Broadcaster: a single poller thread reads
+the shared stores once per interval and fans whatever changed out to
+every client connected to that worker. A client costs a queue, not a
+database query, and changes made through any worker reach the clients
+of every worker within one interval.
+
+Each open stream holds a thread of a gthread worker until the client
+goes away, so a Broadcaster takes at most `max_clients` streams and
+/api/live answers 503 past that. The default leaves one thread of every
+worker for ordinary requests, so sync workers take no streams at all;
+under gevent/eventlet, where a stream is a cheap greenlet, there is no
+cap. Public pages do not open streams.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+
+from background import PerProcessThread
+
+
+# How often the poller looks for changes, in seconds
+POLL_INTERVAL = 1.0
+
+# Idle streams get a comment this often so proxies keep them open and
+# dead clients are noticed
+HEARTBEAT_INTERVAL = 15.0
+
+# Client reconnect delay sent to EventSource, in milliseconds
+RETRY_MS = 3000
+
+# Retry-After for clients turned away by a full Broadcaster, in seconds
+FULL_RETRY_AFTER = 30
+
+logger = logging.getLogger(__name__)
+
+
+def default_max_clients():
+    """Streams per worker for the gunicorn settings in the environment (None: no cap)
+
+    0 for sync workers: a stream would pin the worker's only thread
+    until gunicorn's timeout killed it.
+    """
+    worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+    if worker_class in ("gevent", "eventlet"):
+        return None
+    # Same defaults as gunicorn.conf.py; gunicorn runs sync with threads > 1 as gthread
+    threads = int(os.environ.get("GUNICORN_THREADS", "1" if worker_class == "sync" else "4"))
+    # Keep one thread for other requests
+    return max(threads - 1, 0)
+
+
+def format_event(event, data, dumps):
+    """One SSE message; `dumps` must produce single-line JSON"""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+class PredictionFeed:
+    """'predictions' events: active rows added or changed, and ids removed"""
+
+    topic = "predictions"
+
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self.updated_at = None
+        self.records = {}  # id -> Prediction, shared with the store's record cache
+
+    def snapshot(self):
+        return {"version": self.version, "updated_at": self.updated_at}
+
+    def poll(self):
+        version = self.store.version()
+        if version == self.version:
+            return None
+        records = {record.id: record for record in self.store.active_records()}
+        previous, first_poll = self.records, self.version is None
+        self.version, self.records = version, records
+        self.updated_at = self.store.updated_at().isoformat()
+        if first_poll:
+            return None
+        # Only the changed rows are turned into dicts, and only for this event
+        upserted = [record.as_dict() for record_id, record in records.items()
+                    if previous.get(record_id) != record]
+        removed = [record_id for record_id in previous if record_id not in records]
+        return {
+            "version": version,
+            "updated_at": self.updated_at,
+            "upserted": upserted,
+            "removed": removed,
+        }
+
+
+class VisitorFeed:
+    """'visitors' events: new totals for the pages that were viewed"""
+
+    topic = "visitors"
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.page_views = None
+
+    def snapshot(self):
+        page_views = self.page_views or {}
+        return {"total_visits": sum(page_views.values()), "page_views": page_views}
+
+    def poll(self):
+        page_views = self.recorder.page_view_counts()
+        previous = self.page_views
+        self.page_views = page_views
+        if previous is None or page_views == previous:
+            return None
+        changed = {page: count for page, count in page_views.items() if previous.get(page) != count}
+        return {
+            "total_visits": sum(page_views.values()),
+            "new_visits": sum(page_views.values()) - sum(previous.values()),
+            "page_views": changed,
+        }
+
+
+class Subscription:
+    """One client's pending events"""
+
+    def __init__(self, topics, max_backlog):
+        self.topics = topics
+        self.events = queue.Queue(maxsize=max_backlog)
+        self.overflowed = False
+
+    def put(self, topic, data):
+        try:
+            self.events.put_nowait((topic, data))
+        except queue.Full:
+            # A client this far behind reconnects and starts from a snapshot
+            self.overflowed = True
+
+
+class Broadcaster:
+    """Polls feeds in one thread per process and fans events out to clients"""
+
+    def __init__(self, feeds, interval=POLL_INTERVAL, max_backlog=256, max_clients=None):
+        self.feeds = {feed.topic: feed for feed in feeds}
+        self.interval = interval
+        self.max_backlog = max_backlog
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = PerProcessThread(self._run, "live-poller", setup=self._reset)
+
+    def _reset(self):
+        self._subscribers = set()
+        # Catch up quietly; nobody in this process is listening yet
+        self._poll(publish=False)
+
+    def _poll(self, publish=True):
+        for topic, feed in self.feeds.items():
+            try:
+                data = feed.poll()
+            except Exception:
+                logger.exception("Polling the %s feed failed", topic)
+                continue
+            if data is not None and publish:
+                self.publish(topic, data)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self._poll()
+
+    def publish(self, topic, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if topic in subscription.topics:
+                subscription.put(topic, data)
+
+    def topics_from(self, value):
+        """Topic names from a comma-separated ?topics= value (default: all)"""
+        if not value:
+            return set(self.feeds)
+        topics = {topic.strip() for topic in value.split(",") if topic.strip()}
+        unknown = topics - set(self.feeds)
+        if unknown:
+            raise ValueError(f"unknown topics: {', '.join(sorted(unknown))}; "
+                             f"choose from {', '.join(self.feeds)}")
+        return topics
+
+    def subscribe(self, topics):
+        """A Subscription to `topics`, or None when max_clients streams are open"""
+        self._poller.ensure()
+        subscription = Subscription(topics, self.max_backlog)
+        with self._lock:
+            if self.max_clients is not None and len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stream(self, subscription, dumps, heartbeat=HEARTBEAT_INTERVAL):
+        """Generator of SSE text for a subscribe()d client.
+
+        Starts with a 'snapshot' event holding each topic's current state,
+        then one event per change; clients that fall behind are dropped
+        and reconnect to a fresh snapshot. Call unsubscribe() when the
+        response is closed, since a stream never started never ends.
+        """
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            yield format_event("snapshot", {
+                topic: self.feeds[topic].snapshot() for topic in sorted(subscription.topics)
+            }, dumps)
+            while not subscription.overflowed:
+                try:
+                    topic, data = subscription.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(topic, data, dumps)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._subscribers), "max_clients": self.max_clients,
+                    "topics": list(self.feeds)}
@@ -0,0 +1,300 @@
+"""Request metrics in Prometheus text format, summed over all workers.
+
+Each worker counts into lock-free sharded counters (counters.py) and a
+background thread saves the worker's cumulative values to a shared
+SQLite file every few seconds. /metrics saves the answering worker's
+values first and then adds up every worker's rows, so any worker
+reports the same totals. Counts from workers that have exited are
+folded into a single "retired" row so totals never go backwards; their
+in-flight gauges are dropped.
+
+Recorded per endpoint: request counts by method and status, latency
+and response size histograms, and how much of each request went to
+visitor tracking, template rendering and JSON serialization.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+
+from background import PerProcessThread
+from counters import ShardedCounters
+from store import SQLiteDatabase
+
+DEFAULT_METRICS_PATH = os.environ.get(
+    "SUREBET_METRICS_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics.db")
+)
+
+# Seconds between saves of a worker's values
+FLUSH_INTERVAL = 5.0
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "surebet_http_requests_total": (
+        "counter", "Requests handled, by endpoint, method and status.", None),
+    "surebet_http_request_duration_seconds": (
+        "histogram", "Time to produce the response, by endpoint.", LATENCY_BUCKETS),
+    "surebet_http_response_size_bytes": (
+        "histogram", "Response body size as sent, by endpoint.", SIZE_BUCKETS),
+    "surebet_http_requests_in_flight": (
+        "gauge", "Requests being handled right now.", None),
+    "surebet_phase_duration_seconds": (
+        "histogram", "Time spent in visitor tracking, template rendering and JSON "
+                     "serialization, by endpoint and phase.", LATENCY_BUCKETS),
+}
+
+METRICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_samples (
+    worker TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (worker, key)
+) WITHOUT ROWID;
+"""
+
+RETIRED_WORKER = "retired"
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _base_name(name):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+            return name[:-len(suffix)]
+    return name
+
+
+class MetricsStore(SQLiteDatabase):
+    """Every worker's cumulative metric values, one row per worker and series"""
+
+    def __init__(self, path=DEFAULT_METRICS_PATH):
+        super().__init__(path)
+        self._connection().executescript(METRICS_SCHEMA)
+
+    def save(self, worker, samples):
+        """Replace `worker`'s rows with {(name, labels): value}"""
+        rows = [
+            (worker, json.dumps([name, labels]), METRICS[_base_name(name)][0], value)
+            for (name, labels), value in samples.items()
+        ]
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_samples (worker, key, kind, value) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+
+    def retire_dead_workers(self):
+        """Fold the counters of exited workers into one row and drop the rest"""
+        conn = self._connection()
+        workers = [row[0] for row in conn.execute("SELECT DISTINCT worker FROM metric_samples")]
+        dead = [
+            worker for worker in workers
+            if worker != RETIRED_WORKER and not _pid_alive(int(worker.split(":")[0]))
+        ]
+        if not dead:
+            return
+        marks = ", ".join("?" * len(dead))
+        with self.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO metric_samples (worker, key, kind, value) "
+                f"SELECT ?, key, kind, SUM(value) FROM metric_samples "
+                f"WHERE worker IN ({marks}) AND kind != 'gauge' GROUP BY key, kind "
+                f"ON CONFLICT (worker, key) DO UPDATE SET value = value + excluded.value",
+                (RETIRED_WORKER, *dead)
+            )
+            conn.execute(f"DELETE FROM metric_samples WHERE worker IN ({marks})", dead)
+
+    def totals(self):
+        """{(name, labels): value} summed over all workers"""
+        rows = self._connection().execute(
+            "SELECT key, SUM(value) FROM metric_samples GROUP BY key"
+        )
+        totals = {}
+        for key, value in rows:
+            name, labels = json.loads(key)
+            totals[name, tuple(map(tuple, labels))] = value
+        return totals
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(totals):
+    """Prometheus text exposition (version 0.0.4) of summed samples"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind != "histogram":
+            for (sample, labels), value in sorted(totals.items()):
+                if sample == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            if kind == "gauge" and not any(sample == name for sample, _ in totals):
+                lines.append(f"{name} 0")
+            continue
+
+        series = sorted({labels for sample, labels in totals if sample == f"{name}_count"})
+        for labels in series:
+            # Buckets are stored per bucket; Prometheus wants them cumulative
+            cumulative = 0
+            for bound in (*buckets, "+Inf"):
+                cumulative += totals.get((f"{name}_bucket", labels + (("le", str(bound)),)), 0)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} "
+                             f"{_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} "
+                         f"{_format_value(totals.get((f'{name}_sum', labels), 0))}")
+            lines.append(f"{name}_count{_format_labels(labels)} "
+                         f"{_format_value(totals.get((f'{name}_count', labels), 0))}")
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """Records request metrics for an app and serves them at /metrics"""
+
+    def __init__(self, app=None, store=None, flush_interval=FLUSH_INTERVAL):
+        self.store = store or MetricsStore()
+        self.flush_interval = flush_interval
+        self.samples = ShardedCounters()
+        self._worker = None
+        self._flusher = PerProcessThread(self._run, "metrics-flusher", setup=self._reset, at_exit=self.flush)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Install the hooks; call after app.json is set so its output is timed"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+        json_response = app.json.response
+
+        def timed_json_response(*args, **kwargs):
+            with self.phase("serialization"):
+                return json_response(*args, **kwargs)
+
+        app.json.response = timed_json_response
+        app.add_url_rule("/metrics", "metrics", self.serve)
+        app.extensions["metrics"] = self
+
+    def _reset(self):
+        # Counts copied from the parent process are not ours
+        self.samples = ShardedCounters()
+        self._worker = f"{os.getpid()}:{time.time():.6f}"
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Saving metrics failed")
+
+    def flush(self):
+        """Save this worker's cumulative values to the shared store"""
+        if self._flusher.started():
+            self.store.save(self._worker, self.samples.snapshot())
+
+    # Recording
+
+    def inc(self, name, labels=(), amount=1):
+        self.samples.add((name, labels), amount)
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        bound = next((bound for bound in buckets if value <= bound), "+Inf")
+        self.samples.add((f"{name}_bucket", labels + (("le", str(bound)),)), 1)
+        self.samples.add((f"{name}_sum", labels), value)
+        self.samples.add((f"{name}_count", labels), 1)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to the current request's `name` phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if has_request_context():
+                phases = g.setdefault("metric_phases", {})
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+    def _render_started(self, sender, template, context, **extra):
+        g.metric_render_started = time.perf_counter()
+
+    def _render_finished(self, sender, template, context, **extra):
+        started = g.pop("metric_render_started", None)
+        if started is not None:
+            phases = g.setdefault("metric_phases", {})
+            phases["rendering"] = phases.get("rendering", 0.0) + time.perf_counter() - started
+
+    def _before_request(self):
+        self._flusher.ensure()
+        g.metric_started = time.perf_counter()
+        self.inc("surebet_http_requests_in_flight")
+
+    def _record(self, status, size=None):
+        endpoint = request.endpoint or "unmatched"
+        labels = (("endpoint", endpoint),)
+        self.inc("surebet_http_requests_total",
+                 (("endpoint", endpoint), ("method", request.method), ("status", str(status))))
+        self.observe("surebet_http_request_duration_seconds", labels,
+                     time.perf_counter() - g.metric_started)
+        if size is not None:
+            self.observe("surebet_http_response_size_bytes", labels, size)
+        for phase, seconds in g.get("metric_phases", {}).items():
+            self.observe("surebet_phase_duration_seconds", labels + (("phase", phase),), seconds)
+        g.metric_recorded = True
+
+    def _after_request(self, response):
+        if "metric_started" in g:
+            self._record(response.status_code,
+                         None if response.is_streamed else response.calculate_content_length())
+        return response
+
+    def _teardown_request(self, exc):
+        if "metric_started" not in g:
+            return
+        if not g.get("metric_recorded"):
+            # An unhandled error skipped after_request
+            self._record(500)
+        self.inc("surebet_http_requests_in_flight", amount=-1)
+
+    # Exposition
+
+    def serve(self):
+        """Prometheus scrape endpoint"""
+        self._flusher.ensure()
+        self.flush()
+        self.store.retire_dead_workers()
+        return Response(render_prometheus(self.store.totals()),
+                        mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,194 @@
+"""Typed prediction records.
+
+SQLite hands predictions back as strings: odds "1.85", a date and a
+time in separate columns, confidence as free text. Prediction parses a
+row once into float odds, one kickoff datetime and Confidence/Status
+enums, so sorting and filtering compare numbers and datetimes instead
+of re-parsing strings. Records use __slots__ and take less than half
+the memory of the equivalent row dict.
+
+Prediction.parse() validates user input (the add form, bulk imports)
+before it reaches the store. to_row() gives the storage strings back
+and as_dict() the public JSON shape. Neither is cached on the record,
+which would cost more memory than the row dict it replaces.
+"""
+from datetime import datetime
+from enum import Enum
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Largest value SQLite stores in an INTEGER column; bigger Python ints overflow
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+
+class Confidence(str, Enum):
+    HIGH = "High"
+    MEDIUM = "Medium"
+    LOW = "Low"
+
+    def __str__(self):
+        return self.value
+
+
+class Status(str, Enum):
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+
+    def __str__(self):
+        return self.value
+
+
+# Fields parse() requires; status and created_at are optional
+REQUIRED_FIELDS = ("match", "league", "date", "time", "prediction", "odds", "confidence")
+
+
+def format_odds(odds):
+    """'1.85' for 1.85; two decimals unless the price has more"""
+    return f"{odds:.2f}" if round(odds, 2) == odds else repr(odds)
+
+
+def _timestamp(value):
+    # fromisoformat reads TIMESTAMP_FORMAT and is far faster than strptime
+    return datetime.fromisoformat(value) if value else None
+
+
+class Prediction:
+    """One prediction with parsed fields"""
+
+    __slots__ = ("id", "match", "league", "kickoff", "prediction", "odds", "confidence",
+                 "status", "created_at", "result", "settled_at")
+
+    def __init__(self, match, league, kickoff, prediction, odds, confidence,
+                 status=Status.ACTIVE, created_at=None, id=None, result=None, settled_at=None):
+        self.id = id
+        self.match = match
+        self.league = league
+        self.kickoff = kickoff
+        self.prediction = prediction
+        self.odds = odds
+        self.confidence = confidence
+        self.status = status
+        self.created_at = created_at
+        self.result = result
+        self.settled_at = settled_at
+
+    def __eq__(self, other):
+        if not isinstance(other, Prediction):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # mutable
+
+    def __repr__(self):
+        return f"<Prediction {self.id} {self.match!r} {self.kickoff:%Y-%m-%d %H:%M}>"
+
+    # Template and row compatibility
+
+    @property
+    def date(self):
+        return self.kickoff.strftime("%Y-%m-%d")
+
+    @property
+    def time(self):
+        return self.kickoff.strftime("%H:%M")
+
+    @property
+    def active(self):
+        return self.status is Status.ACTIVE
+
+    @classmethod
+    def from_row(cls, row):
+        """A record from a trusted store row (a dict or sqlite3.Row)"""
+        return cls(
+            id=row["id"],
+            match=row["match"],
+            league=row["league"],
+            kickoff=datetime.fromisoformat(f"{row['date']} {row['time']}"),
+            prediction=row["prediction"],
+            odds=float(row["odds"]),
+            confidence=Confidence(row["confidence"]),
+            status=Status(row["status"]),
+            created_at=_timestamp(row["created_at"]),
+            result=row["result"],
+            settled_at=_timestamp(row["settled_at"]),
+        )
+
+    @classmethod
+    def parse(cls, data):
+        """A new record from untrusted input (form fields or an upload row), or ValueError"""
+        if not hasattr(data, "get"):
+            raise ValueError("expected an object")
+        clean = {}
+        for field in (*REQUIRED_FIELDS, "status", "created_at"):
+            value = data.get(field)
+            if value is not None and str(value).strip():
+                clean[field] = str(value).strip()
+
+        missing = [field for field in REQUIRED_FIELDS if field not in clean]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        try:
+            kickoff_date = datetime.strptime(clean["date"], "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"date {clean['date']!r} is not YYYY-MM-DD")
+        try:
+            kickoff_time = datetime.strptime(clean["time"], "%H:%M")
+        except ValueError:
+            raise ValueError(f"time {clean['time']!r} is not HH:MM")
+        try:
+            odds = float(clean["odds"])
+        except ValueError:
+            raise ValueError(f"odds {clean['odds']!r} is not a number")
+        if not 1 < odds < float("inf"):
+            raise ValueError("odds must be greater than 1")
+        try:
+            confidence = Confidence(clean["confidence"])
+        except ValueError:
+            raise ValueError(f"confidence must be one of {', '.join(c.value for c in Confidence)}")
+        try:
+            status = Status(clean.get("status", Status.ACTIVE.value))
+        except ValueError:
+            raise ValueError(f"status must be one of {', '.join(s.value for s in Status)}")
+        created_at = None
+        if "created_at" in clean:
+            try:
+                created_at = datetime.strptime(clean["created_at"], TIMESTAMP_FORMAT)
+            except ValueError:
+                raise ValueError("created_at is not YYYY-MM-DD HH:MM:SS")
+
+        return cls(
+            match=clean["match"],
+            league=clean["league"],
+            kickoff=kickoff_date.replace(hour=kickoff_time.hour, minute=kickoff_time.minute),
+            prediction=clean["prediction"],
+            odds=odds,
+            confidence=confidence,
+            status=status,
+            created_at=created_at,
+        )
+
+    def to_row(self):
+        """Column values as stored, without id or result (the store sets those)"""
+        row = {
+            "match": self.match,
+            "league": self.league,
+            "date": self.date,
+            "time": self.time,
+            "prediction": self.prediction,
+            "odds": format_odds(self.odds),
+            "confidence": self.confidence.value,
+            "status": self.status.value,
+        }
+        if self.created_at is not None:
+            row["created_at"] = self.created_at.strftime(TIMESTAMP_FORMAT)
+        return row
+
+    def as_dict(self):
+        """The public JSON shape (same fields and formats as a store row)"""
+        return {
+            "id": self.id,
+            **self.to_row(),
+            "created_at": self.created_at.strftime(TIMESTAMP_FORMAT) if self.created_at else None,
+            "result": self.result,
+            "settled_at": self.settled_at.strftime(TIMESTAMP_FORMAT) if self.settled_at else None,
+        }
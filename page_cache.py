@@ -0,0 +1,126 @@
+"""Full-page output cache for the public pages.
+
+Rendered pages are stored per endpoint and data version. Each entry is
+compressed into a client's preferred encoding the first time one asks
+for it and keeps that variant, so a page is compressed once per
+encoding and data version rather than once per request. The version
+comes from the prediction store, so a change made through any worker is
+seen by all of them, and a new version makes every older entry
+unreachable - cached pages never need per-key invalidation. Each entry
+also carries a content ETag so repeat visitors can revalidate with a
+304. JSON API responses are cached the same way, as their serialized
+bytes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+from assets import preferred_encoding
+from compression import ENCODINGS, MIN_SIZE, compress
+from conditional import make_conditional
+
+
+class PageCache:
+    """Bounded LRU of rendered responses keyed by (endpoint, key, data version)"""
+
+    def __init__(self, version=None, max_entries=64):
+        self.max_entries = max_entries
+        # Callable returning the current data version; None keeps a local one
+        self.version_source = version
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self):
+        """Invalidate every cached page after a local data change"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def _current_version(self):
+        if self.version_source is None:
+            return self.version
+        version = self.version_source()
+        if version != self.version:
+            # Entries for the old version can never be hit again
+            with self._lock:
+                self.version = version
+                self._entries.clear()
+        return version
+
+    def serve(self, render, last_modified=None, key=None):
+        """Respond from the cache, calling `render()` only on a miss
+
+        Entries are per endpoint unless `key` tells variants apart, e.g.
+        the query string of a filtered API call.
+        """
+        key = (request.endpoint, key, self._current_version())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if entry is None:
+            entry = self._store(key, render())
+            cache_status = "MISS"
+        else:
+            cache_status = "HIT"
+
+        headers = {"Vary": "Accept-Encoding", "X-Cache": cache_status}
+        body = entry["body"]
+        encoding = preferred_encoding(ENCODINGS) if len(body) >= MIN_SIZE else None
+        if encoding:
+            body = self._variant(entry, encoding)
+            headers["Content-Encoding"] = encoding
+
+        response = Response(body, mimetype=entry["mimetype"], headers=headers)
+        return make_conditional(response, etag=entry["etag"], last_modified=last_modified)
+
+    def _variant(self, entry, encoding):
+        variant = entry["variants"].get(encoding)
+        if variant is None:
+            # Two threads may both compress a fresh entry; either result is fine
+            variant = entry["variants"][encoding] = compress(entry["body"], encoding)
+        return variant
+
+    def _store(self, key, rendered):
+        if isinstance(rendered, Response):
+            body, mimetype = rendered.get_data(), rendered.mimetype
+        else:
+            body, mimetype = rendered.encode("utf-8"), "text/html"
+
+        entry = {
+            "body": body,
+            "variants": {},  # Content-Encoding -> compressed body
+            "mimetype": mimetype,
+            # Weak: the same tag covers the identity and compressed bodies
+            "etag": hashlib.sha1(body).hexdigest()[:16],
+        }
+        with self._lock:
+            self.misses += 1
+            # A render that raced with bump() belongs to a dead version
+            if key[-1] == self.version:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,46 @@
+"""The public pages: home, predictions, statistics and about."""
+from flask import Blueprint, render_template
+
+from services import services, track_visitor
+
+bp = Blueprint("public", __name__)
+
+
+@bp.route("/")
+def home():
+    # Track homepage visit
+    track_visitor('Home')
+
+    return services().page_cache.serve(lambda: render_template("home.html"))
+
+@bp.route("/predictions")
+def predictions():
+    # Track predictions page visit
+    track_visitor('Predictions')
+
+    svc = services()
+    updated_at = svc.predictions.updated_at()
+    return svc.page_cache.serve(lambda: render_template(
+        "predictions.html",
+        predictions=svc.predictions.active_records(),
+        surebets=svc.surebets.best_by_event(),
+        updated=updated_at
+    ), last_modified=updated_at)
+
+@bp.route("/statistics")
+def statistics():
+    # Track statistics page visit
+    track_visitor('Statistics')
+
+    svc = services()
+    return svc.page_cache.serve(
+        lambda: render_template("statistics.html", stats=svc.statistics.snapshot()),
+        last_modified=svc.predictions.updated_at()
+    )
+
+@bp.route("/about")
+def about():
+    # Track about page visit
+    track_visitor('About')
+
+    return services().page_cache.serve(lambda: render_template("about.html"))
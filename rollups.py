@@ -0,0 +1,162 @@
+"""Time-bucketed visit counts per page.
+
+Recent traffic lives in fixed-size, array-backed ring buffers, one per
+page and granularity, so a range query reads exactly the buckets it
+asks for. Whole days are compacted into a per-page daily tier that is
+kept for all history.
+
+    minute  60 s buckets, last 24 hours   (1440 slots)
+    hour    1 h buckets, last 31 days     (744 slots)
+    day     1 day buckets, all history
+
+Buckets follow local wall-clock time, like the visit log timestamps.
+Counts for every page are also kept under ALL_PAGES so site-wide
+queries cost the same as per-page ones.
+"""
+import calendar
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ALL_PAGES = "*"
+
+# granularity -> (bucket width in seconds, ring slots)
+RING_TIERS = {
+    "minute": (60, 24 * 60),
+    "hour": (3600, 31 * 24),
+}
+GRANULARITIES = ("minute", "hour", "day")
+
+# Largest series a single query may ask for
+MAX_BUCKETS = 1500
+
+# Range used when a query gives no 'from'
+DEFAULT_SPANS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(hours=23),
+    "day": timedelta(days=6),
+}
+
+# Wall-clock bucket numbers count from here
+EPOCH = datetime(1970, 1, 1)
+
+
+def wall_seconds(moment):
+    """Local wall-clock seconds for a datetime or a time.time() value"""
+    if isinstance(moment, datetime):
+        return calendar.timegm(moment.timetuple())
+    return calendar.timegm(time.localtime(moment))
+
+
+def visit_seconds(visit):
+    """Wall-clock seconds of a visit record"""
+    if 'time' in visit:
+        return wall_seconds(visit['time'])
+    return calendar.timegm(time.strptime(visit['timestamp'], '%Y-%m-%d %H:%M:%S'))
+
+
+class RingSeries:
+    """Counts for the last `size` buckets of `width` seconds.
+
+    Each slot remembers which bucket it holds, so a slot reused by a
+    newer bucket reads as zero for the old one instead of a wrong count.
+    """
+    __slots__ = ("width", "buckets", "counts")
+
+    def __init__(self, width, size, buckets=None, counts=None):
+        self.width = width
+        self.buckets = array("q", [-1]) * size
+        self.counts = array("q", [0]) * size
+        if buckets is not None:
+            self.buckets = array("q")
+            self.buckets.frombytes(buckets)
+            self.counts = array("q")
+            self.counts.frombytes(counts)
+
+    def add(self, bucket, count=1):
+        slot = bucket % len(self.counts)
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += count
+
+    def get(self, bucket):
+        slot = bucket % len(self.counts)
+        return self.counts[slot] if self.buckets[slot] == bucket else 0
+
+    def to_bytes(self):
+        return self.buckets.tobytes(), self.counts.tobytes()
+
+
+def bucket_batch(visits):
+    """Aggregate visits into {(page, granularity, key): count}.
+
+    Keys are bucket numbers for the ring tiers and date strings for the
+    day tier, and every visit is counted for its page and ALL_PAGES.
+    """
+    counts = defaultdict(int)
+    for visit in visits:
+        seconds = visit_seconds(visit)
+        date = visit['timestamp'][:10]
+        for page in (visit['page'], ALL_PAGES):
+            for granularity, (width, _) in RING_TIERS.items():
+                counts[page, granularity, seconds // width] += 1
+            counts[page, "day", date] += 1
+    return counts
+
+
+def bucket_keys(granularity, start, end, now=None):
+    """(label, key) for every bucket between two datetimes, inclusive.
+
+    Ring tiers are clipped to what the ring still holds; raises
+    ValueError for unknown granularities or over-long ranges.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if end < start:
+        raise ValueError("'from' must not be after 'to'")
+
+    if granularity == "day":
+        first, last = start.date(), end.date()
+        if (last - first).days >= MAX_BUCKETS:
+            raise ValueError(f"at most {MAX_BUCKETS} buckets per query")
+        days = ((first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1))
+        return [(day, day) for day in days]
+
+    width, size = RING_TIERS[granularity]
+    first, last = wall_seconds(start) // width, wall_seconds(end) // width
+    newest = wall_seconds(now or datetime.now()) // width
+    first = max(first, newest - size + 1)
+    if last - first >= MAX_BUCKETS:
+        raise ValueError(f"at most {MAX_BUCKETS} buckets per query")
+    return [
+        ((EPOCH + timedelta(seconds=bucket * width)).isoformat(timespec="minutes"), bucket)
+        for bucket in range(first, last + 1)
+    ]
+
+
+class MemoryRollups:
+    """Rollups for one process, used by the memory analytics backend"""
+
+    def __init__(self):
+        self.rings = defaultdict(dict)   # page -> granularity -> RingSeries
+        self.days = defaultdict(dict)    # page -> date -> count
+
+    def add_batch(self, visits):
+        for (page, granularity, key), count in bucket_batch(visits).items():
+            if granularity == "day":
+                self.days[page][key] = self.days[page].get(key, 0) + count
+                continue
+            ring = self.rings[page].get(granularity)
+            if ring is None:
+                ring = self.rings[page][granularity] = RingSeries(*RING_TIERS[granularity])
+            ring.add(key, count)
+
+    def series(self, page, granularity, start, end):
+        keys = bucket_keys(granularity, start, end)
+        if granularity == "day":
+            days = self.days.get(page, {})
+            return [(label, days.get(key, 0)) for label, key in keys]
+        ring = self.rings.get(page, {}).get(granularity)
+        return [(label, ring.get(key) if ring else 0) for label, key in keys]
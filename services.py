@@ -0,0 +1,80 @@
+"""Per-app stores, caches and engines, built once by create_app().
+
+Views reach them through services(), which returns the instance
+registered on the current app. Everything here is safe to build before
+gunicorn forks its workers: SQLite connections are reopened and
+background threads started lazily in each process that uses them.
+"""
+import time
+
+from flask import current_app, request
+
+from analytics import create_recorder
+from live import Broadcaster, PredictionFeed, VisitorFeed
+from page_cache import PageCache
+from stats import StatisticsEngine
+from store import PredictionStore
+from surebets import SurebetEngine
+
+
+class Services:
+    """What the views of one app share"""
+
+    def __init__(self, config):
+        # Predictions live in SQLite (surebet.db) and are shared by every worker
+        self.predictions = PredictionStore(config["SUREBET_DB"])
+
+        # Accuracy, odds and ROI from settled predictions, see stats.py
+        self.statistics = StatisticsEngine(self.predictions)
+
+        # Best prices per market across bookmakers and the arbitrage they allow
+        self.surebets = SurebetEngine(self.predictions)
+
+        # Rendered public pages, invalidated whenever the prediction store changes
+        self.page_cache = PageCache(version=self.predictions.version)
+
+        # Serialized API responses, on the same versioning as the pages
+        self.api_cache = PageCache(version=self.predictions.version, max_entries=256)
+
+        # Visitor tracking: queued here, written in batches by a background
+        # thread to a backend shared across workers (see analytics.py).
+        # Only the admin app tracks visits.
+        feeds = [PredictionFeed(self.predictions)]
+        self.analytics = None
+        if config["ADMIN"]:
+            backend = config["SUREBET_ANALYTICS"]
+            options = {}
+            if backend == "sqlite":
+                options = {"path": config["SUREBET_ANALYTICS_DB"], "log_dir": config["SUREBET_VISIT_LOG"]}
+            self.analytics = create_recorder(backend, **options)
+            feeds.append(VisitorFeed(self.analytics))
+
+        # Pushes changes to /api/live clients, see live.py
+        self.live = Broadcaster(feeds, max_clients=config["LIVE_MAX_CLIENTS"])
+
+    def init_app(self, app):
+        app.extensions["services"] = self
+
+    def warm(self):
+        """Load what the first requests would, so forked workers inherit it"""
+        self.predictions.active_records()
+        self.surebets.refresh()
+
+
+def services():
+    """The current app's Services"""
+    return current_app.extensions["services"]
+
+
+def track_visitor(page_name):
+    """Queue a page view for the analytics writer; a no-op without analytics"""
+    recorder = services().analytics
+    if recorder is None:
+        return
+    with current_app.extensions["metrics"].phase("tracking"):
+        recorder.track(
+            request.environ.get("HTTP_X_FORWARDED_FOR", request.environ.get("REMOTE_ADDR", "Unknown")),
+            request.headers.get("User-Agent", "Unknown"),
+            time.time(),
+            page_name
+        )
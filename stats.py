@@ -0,0 +1,164 @@
+"""Running performance aggregates over settled predictions.
+
+Settling a prediction (won, lost or void) adds its contribution to a
+handful of aggregate rows - overall, its league, its market, its
+confidence level and its kickoff month - in the same transaction, and
+re-settling or deleting it takes the old contribution back out first.
+Each settlement therefore touches five rows however long the history
+is, and statistics are read from the aggregates alone, never from the
+predictions table.
+
+Returns assume a flat one-unit stake on every won or lost prediction;
+void predictions are counted but staked nothing.
+"""
+from datetime import date, datetime
+
+RESULTS = ("won", "lost", "void")
+
+# Breakdown scopes and the prediction column each is keyed by
+SCOPES = {
+    "league": "league",
+    "market": "prediction",
+    "confidence": "confidence",
+}
+OVERALL = "overall"
+MONTH = "month"
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prediction_stats (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    won INTEGER NOT NULL DEFAULT 0,
+    lost INTEGER NOT NULL DEFAULT 0,
+    void INTEGER NOT NULL DEFAULT 0,
+    odds_total REAL NOT NULL DEFAULT 0,
+    returned REAL NOT NULL DEFAULT 0,
+    -- Kickoff dates of the earliest and latest settled predictions; they
+    -- only ever widen, which is what "days tracking" wants anyway
+    first_date TEXT,
+    last_date TEXT,
+    PRIMARY KEY (scope, key)
+) WITHOUT ROWID;
+"""
+
+
+def scope_keys(prediction):
+    """The (scope, key) aggregate rows a prediction counts towards"""
+    keys = [(OVERALL, ""), (MONTH, prediction["date"][:7])]
+    keys.extend((scope, prediction[column]) for scope, column in SCOPES.items())
+    return keys
+
+
+def contribution(prediction, result):
+    """Column deltas one prediction settled as `result` adds to each row"""
+    odds = float(prediction["odds"])
+    return {
+        "won": int(result == "won"),
+        "lost": int(result == "lost"),
+        "void": int(result == "void"),
+        "odds_total": odds if result in ("won", "lost") else 0.0,
+        "returned": odds if result == "won" else 0.0,
+    }
+
+
+def apply(conn, prediction, old_result, new_result):
+    """Move `prediction` from `old_result` to `new_result` (either may be None)
+
+    Call inside the transaction that changes the prediction's result.
+    """
+    if old_result == new_result:
+        return
+    deltas = {"won": 0, "lost": 0, "void": 0, "odds_total": 0.0, "returned": 0.0}
+    if old_result:
+        for column, value in contribution(prediction, old_result).items():
+            deltas[column] -= value
+    if new_result:
+        for column, value in contribution(prediction, new_result).items():
+            deltas[column] += value
+    kickoff = prediction["date"] if new_result else None
+    conn.executemany(
+        "INSERT INTO prediction_stats "
+        "(scope, key, won, lost, void, odds_total, returned, first_date, last_date) "
+        "VALUES (:scope, :key, :won, :lost, :void, :odds_total, :returned, :kickoff, :kickoff) "
+        "ON CONFLICT (scope, key) DO UPDATE SET "
+        "won = won + excluded.won, lost = lost + excluded.lost, void = void + excluded.void, "
+        "odds_total = odds_total + excluded.odds_total, returned = returned + excluded.returned, "
+        "first_date = MIN(COALESCE(first_date, excluded.first_date), "
+        "COALESCE(excluded.first_date, first_date)), "
+        "last_date = MAX(COALESCE(last_date, excluded.last_date), "
+        "COALESCE(excluded.last_date, last_date))",
+        [{"scope": scope, "key": key, "kickoff": kickoff, **deltas}
+         for scope, key in scope_keys(prediction)]
+    )
+
+
+def rebuild(conn):
+    """Recompute every aggregate from the predictions table (a full scan)"""
+    conn.execute("DELETE FROM prediction_stats")
+    rows = conn.execute("SELECT * FROM predictions WHERE result IS NOT NULL")
+    for row in rows.fetchall():
+        apply(conn, dict(row), None, row["result"])
+
+
+def summarize(row):
+    """Public figures for one aggregate row"""
+    decided = row["won"] + row["lost"]
+    return {
+        "settled": decided + row["void"],
+        "won": row["won"],
+        "lost": row["lost"],
+        "void": row["void"],
+        "accuracy": round(row["won"] / decided * 100, 1) if decided else None,
+        "average_odds": round(row["odds_total"] / decided, 2) if decided else None,
+        "profit": round(row["returned"] - decided, 2),
+        "roi": round((row["returned"] - decided) / decided * 100, 1) if decided else None,
+    }
+
+
+class StatisticsEngine:
+    """Builds the published statistics from a PredictionStore's aggregates"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def snapshot(self):
+        """Overall figures plus per-league, market, confidence and month breakdowns"""
+        rows = sorted(self.store.stats_rows(), key=lambda row: row["key"])
+        overall = next((row for row in rows if row["scope"] == OVERALL), None)
+        empty = {"won": 0, "lost": 0, "void": 0, "odds_total": 0.0, "returned": 0.0}
+        stats = summarize(overall or empty)
+        stats["tracking_days"] = 0
+        if overall and overall["first_date"]:
+            first = date.fromisoformat(overall["first_date"])
+            last = date.fromisoformat(overall["last_date"])
+            stats["tracking_days"] = (last - first).days + 1
+
+        breakdowns = {scope: {} for scope in (*SCOPES, MONTH)}
+        for row in rows:
+            summary = summarize(row)
+            # Rows whose predictions were all unsettled again stay at zero
+            if row["scope"] in breakdowns and summary["settled"]:
+                breakdowns[row["scope"]][row["key"]] = summary
+        for scope in SCOPES:
+            stats[f"by_{scope}"] = breakdowns[scope]
+        stats["monthly"] = [
+            {"month": month, **summary}
+            for month, summary in reversed(breakdowns[MONTH].items())
+        ]
+        return stats
+
+    def api_data(self):
+        """snapshot() plus the field names /api/statistics has always had"""
+        snapshot = self.snapshot()
+        return {
+            "overall_accuracy": snapshot["accuracy"],
+            "successful_predictions": snapshot["won"],
+            "average_odds": snapshot["average_odds"],
+            "tracking_days": snapshot["tracking_days"],
+            # e.g. {"may_2025": 92.0}
+            "monthly_performance": {
+                datetime.strptime(month["month"], "%Y-%m").strftime("%B_%Y").lower(): month["accuracy"]
+                for month in snapshot["monthly"]
+            },
+            **snapshot,
+        }
@@ -0,0 +1,611 @@
+"""SQLite-backed prediction store shared by every gunicorn worker.
+
+The database runs in WAL mode so readers never block the admin writer,
+and each thread of each worker keeps one connection open for its whole
+life. Every mutation bumps a version number stored alongside the data,
+which the page cache uses to notice changes made by other workers.
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import stats
+import surebets
+from models import SQLITE_MAX_INT, TIMESTAMP_FORMAT, Prediction
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SUREBET_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "surebet.db")
+)
+
+# Written into an empty database the first time it is opened
+SEED_PREDICTIONS = [
+    {
+        "id": 1,
+        "match": "Manchester United vs Chelsea",
+        "league": "Premier League",
+        "date": "2025-06-10",
+        "time": "15:00",
+        "prediction": "Over 2.5 Goals",
+        "odds": "1.85",
+        "confidence": "High",
+        "status": "active",
+        "created_at": "2025-06-09 10:30:00"
+    },
+    {
+        "id": 2,
+        "match": "Barcelona vs Real Madrid",
+        "league": "La Liga",
+        "date": "2025-06-11",
+        "time": "20:00",
+        "prediction": "Both Teams to Score",
+        "odds": "1.72",
+        "confidence": "Medium",
+        "status": "active",
+        "created_at": "2025-06-09 11:15:00"
+    },
+    {
+        "id": 3,
+        "match": "Bayern Munich vs Dortmund",
+        "league": "Bundesliga",
+        "date": "2025-06-12",
+        "time": "18:30",
+        "prediction": "Home Win",
+        "odds": "2.10",
+        "confidence": "High",
+        "status": "active",
+        "created_at": "2025-06-09 12:00:00"
+    }
+]
+
+COLUMNS = ("id", "match", "league", "date", "time", "prediction",
+           "odds", "confidence", "status", "created_at")
+
+# Set only by settle(), which keeps the statistics aggregates in step
+RESULT_COLUMNS = ("result", "settled_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    match TEXT NOT NULL,
+    league TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    prediction TEXT NOT NULL,
+    odds TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_at TEXT NOT NULL,
+    result TEXT,
+    settled_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_status ON predictions (status, id);
+-- query() pages through active rows in kickoff order, optionally per league
+DROP INDEX IF EXISTS idx_predictions_date;
+DROP INDEX IF EXISTS idx_predictions_league;
+CREATE INDEX IF NOT EXISTS idx_predictions_kickoff ON predictions (status, date, time, id);
+CREATE INDEX IF NOT EXISTS idx_predictions_league_kickoff
+    ON predictions (status, league, date, time, id);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Page size limits for query()
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Columns query() sorts by, always fetched so the next cursor can be built
+ORDER_COLUMNS = ("date", "time", "id")
+
+# Admin table sort keys -> ORDER BY terms; id breaks ties so pages are stable
+SORT_KEYS = {
+    "id": ("id",),
+    "match": ("match COLLATE NOCASE",),
+    "league": ("league COLLATE NOCASE",),
+    "kickoff": ("date", "time"),
+    "prediction": ("prediction COLLATE NOCASE",),
+    "odds": ("CAST(odds AS REAL)",),
+    "confidence": ("CASE confidence WHEN 'High' THEN 0 WHEN 'Medium' THEN 1 ELSE 2 END",),
+    "status": ("status",),
+    "created_at": ("created_at",),
+}
+
+# Page size limit for search()
+MAX_ADMIN_PAGE_SIZE = 200
+
+
+def encode_cursor(row):
+    """Opaque token for the position just after `row`"""
+    key = json.dumps([row[col] for col in ORDER_COLUMNS], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        date_, time_, id_ = key
+        if not (isinstance(date_, str) and isinstance(time_, str)
+                and type(id_) is int and 0 <= id_ <= SQLITE_MAX_INT):
+            raise TypeError
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    return date_, time_, id_
+
+
+def filters_from_args(args):
+    """query() keyword arguments from /api/predictions query parameters.
+
+    league and confidence take comma-separated values; from/to are ISO
+    dates; fields is a comma-separated column list. Raises ValueError
+    for malformed values.
+    """
+    def number(name, convert):
+        value = args.get(name)
+        if value is None or value == "":
+            return None
+        try:
+            return convert(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+
+    def iso_date(name):
+        value = args.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f"{name} must be a date like 2025-06-10")
+
+    def names(name):
+        value = args.get(name)
+        return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+    return {
+        "leagues": names("league"),
+        "date_from": iso_date("from"),
+        "date_to": iso_date("to"),
+        "confidence": names("confidence"),
+        "min_odds": number("min_odds", float),
+        "max_odds": number("max_odds", float),
+        "fields": names("fields"),
+        "limit": number("limit", int),
+        "cursor": args.get("cursor") or None,
+    }
+
+
+def search_args_from(args):
+    """search() keyword arguments from /admin/matches query parameters.
+
+    q is the search text, status is active or inactive, sort a SORT_KEYS
+    name and order asc or desc. Raises ValueError for malformed values.
+    """
+    def number(name, default):
+        value = args.get(name)
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a whole number")
+
+    status = args.get("status") or None
+    if status not in (None, "active", "inactive"):
+        raise ValueError("status must be active or inactive")
+    order = args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    return {
+        "text": args.get("q", "").strip() or None,
+        "status": status,
+        "sort": args.get("sort") or "id",
+        "descending": order == "desc",
+        "page": number("page", 1),
+        "per_page": number("per_page", 50),
+    }
+
+
+class SQLiteDatabase:
+    """A WAL-mode SQLite file with one connection per thread per process"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """This thread's connection, reopened after a fork"""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class PredictionStore(SQLiteDatabase):
+    """Prediction rows as plain dicts, persisted in SQLite"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, seed=SEED_PREDICTIONS):
+        super().__init__(path)
+        self._records = (None, [])  # (version, active Prediction records)
+        self._create(seed)
+
+    def _create(self, seed):
+        self._connection().executescript(SCHEMA + stats.STATS_SCHEMA + surebets.ODDS_SCHEMA)
+        # IMMEDIATE so two workers starting together cannot both seed or migrate
+        with self.transaction() as conn:
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(predictions)")}
+            for column in RESULT_COLUMNS:
+                if column not in existing:
+                    # Databases created before settlement existed
+                    conn.execute(f"ALTER TABLE predictions ADD COLUMN {column} TEXT")
+            seeded = conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'version'"
+            ).fetchone()
+            if seeded is None:
+                conn.executemany(
+                    f"INSERT INTO predictions ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [tuple(pred[col] for col in COLUMNS) for pred in seed]
+                )
+                updated_at = max((pred["created_at"] for pred in seed),
+                                 default=datetime.now().strftime(TIMESTAMP_FORMAT))
+                conn.executemany(
+                    "INSERT INTO store_meta (key, value) VALUES (?, ?)",
+                    [("version", "0"), ("updated_at", updated_at)]
+                )
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('odds_seq', '0')")
+
+    def _bump(self, conn):
+        """Record a change; call inside the transaction that made it"""
+        conn.execute(
+            "UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 "
+            "WHERE key = 'version'"
+        )
+        conn.execute(
+            "UPDATE store_meta SET value = ? WHERE key = 'updated_at'",
+            (datetime.now().strftime(TIMESTAMP_FORMAT),)
+        )
+
+    def _write(self, sql, params):
+        """Run one mutation and bump the data version in the same transaction"""
+        with self.transaction() as conn:
+            cursor = conn.execute(sql, params)
+            if cursor.rowcount:
+                self._bump(conn)
+        return cursor
+
+    # Reads
+
+    def all(self):
+        rows = self._connection().execute("SELECT * FROM predictions ORDER BY id")
+        return [dict(row) for row in rows]
+
+    def active(self):
+        rows = self._connection().execute(
+            "SELECT * FROM predictions WHERE status = 'active' ORDER BY id"
+        )
+        return [dict(row) for row in rows]
+
+    def active_records(self):
+        """Active predictions as Prediction records in id order
+
+        Parsed once per data version in each worker and shared by every
+        request until the predictions change, so callers must not modify
+        them.
+        """
+        version = self.version()
+        cached_version, records = self._records
+        if cached_version != version:
+            records = [Prediction.from_row(row) for row in self.active()]
+            self._records = (version, records)
+        return records
+
+    def query(self, leagues=None, date_from=None, date_to=None, confidence=None,
+              min_odds=None, max_odds=None, fields=None, limit=None, cursor=None):
+        """One page of active predictions in kickoff order.
+
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        Pages are found by seeking the (status, [league,] date, time, id)
+        index from the cursor, so each page costs the same however deep.
+        """
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        if fields:
+            unknown = [field for field in fields if field not in COLUMNS + RESULT_COLUMNS]
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+        where, params = ["status = 'active'"], []
+        if leagues:
+            where.append(f"league IN ({', '.join('?' * len(leagues))})")
+            params.extend(leagues)
+        if date_from:
+            where.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("date <= ?")
+            params.append(date_to)
+        if confidence:
+            where.append(f"confidence IN ({', '.join('?' * len(confidence))})")
+            params.extend(confidence)
+        if min_odds is not None:
+            where.append("CAST(odds AS REAL) >= ?")
+            params.append(min_odds)
+        if max_odds is not None:
+            where.append("CAST(odds AS REAL) <= ?")
+            params.append(max_odds)
+        if cursor:
+            where.append("(date, time, id) > (?, ?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        columns = list(dict.fromkeys([*(fields or COLUMNS + RESULT_COLUMNS), *ORDER_COLUMNS]))
+        rows = self._connection().execute(
+            f"SELECT {', '.join(columns)} FROM predictions WHERE {' AND '.join(where)} "
+            f"ORDER BY date, time, id LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
+        if fields:
+            return [{field: row[field] for field in fields} for row in rows], next_cursor
+        return [dict(row) for row in rows], next_cursor
+
+    def search(self, text=None, status=None, sort="id", descending=True,
+               page=1, per_page=50):
+        """One page of predictions for the admin table.
+
+        `text` matches anywhere in the match, league or prediction. Returns
+        (rows, total), total being the number of matching rows. Admins
+        jump between numbered pages in any sort order, so this pages
+        with OFFSET rather than query()'s kickoff-ordered cursors.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        if not 1 <= per_page <= MAX_ADMIN_PAGE_SIZE:
+            raise ValueError(f"per_page must be between 1 and {MAX_ADMIN_PAGE_SIZE}")
+        if page < 1:
+            raise ValueError("page must be 1 or more")
+        if (page - 1) * per_page > SQLITE_MAX_INT:
+            # The OFFSET would overflow SQLite's integers
+            raise ValueError("page is too large")
+
+        where, params = [], []
+        if text:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(" + " OR ".join(
+                f"{column} LIKE ? ESCAPE '\\'" for column in ("match", "league", "prediction")
+            ) + ")")
+            params.extend([pattern] * 3)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        direction = "DESC" if descending else "ASC"
+        order_sql = ", ".join(f"{term} {direction}" for term in (*SORT_KEYS[sort], "id"))
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM predictions {where_sql}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM predictions {where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            (*params, per_page, (page - 1) * per_page)
+        )
+        return [dict(row) for row in rows], total
+
+    def iter_rows(self, status=None, batch_size=500):
+        """Yield every prediction (or those with `status`) in id order.
+
+        Rows are fetched `batch_size` at a time from one open cursor, so
+        an export never holds the whole table in memory.
+        """
+        sql, params = "SELECT * FROM predictions", ()
+        if status:
+            sql, params = sql + " WHERE status = ?", (status,)
+        cursor = self._connection().execute(sql + " ORDER BY id", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
+        finally:
+            # Ends the read transaction even if the client disconnects
+            cursor.close()
+
+    def get(self, prediction_id):
+        row = self._connection().execute(
+            "SELECT * FROM predictions WHERE id = ?", (prediction_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def version(self):
+        """Increments on every change, from any worker"""
+        row = self._connection().execute(
+            "SELECT value FROM store_meta WHERE key = 'version'"
+        ).fetchone()
+        return int(row[0])
+
+    def updated_at(self):
+        """When the predictions last changed"""
+        row = self._connection().execute(
+            "SELECT value FROM store_meta WHERE key = 'updated_at'"
+        ).fetchone()
+        return datetime.strptime(row[0], TIMESTAMP_FORMAT)
+
+    # Writes
+
+    def add(self, prediction):
+        """Insert a new prediction and return it with its id"""
+        fields = {col: prediction[col] for col in COLUMNS if col in prediction and col != "id"}
+        fields.setdefault("status", "active")
+        fields.setdefault("created_at", datetime.now().strftime(TIMESTAMP_FORMAT))
+        cursor = self._write(
+            f"INSERT INTO predictions ({', '.join(fields)}) "
+            f"VALUES ({', '.join('?' * len(fields))})",
+            tuple(fields.values())
+        )
+        return self.get(cursor.lastrowid)
+
+    def add_many(self, predictions):
+        """Insert several predictions in one transaction; returns their ids"""
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        ids = []
+        with self.transaction() as conn:
+            for prediction in predictions:
+                fields = {col: prediction[col] for col in COLUMNS if col in prediction and col != "id"}
+                fields.setdefault("status", "active")
+                fields.setdefault("created_at", now)
+                cursor = conn.execute(
+                    f"INSERT INTO predictions ({', '.join(fields)}) "
+                    f"VALUES ({', '.join('?' * len(fields))})",
+                    tuple(fields.values())
+                )
+                ids.append(cursor.lastrowid)
+            if ids:
+                self._bump(conn)
+        return ids
+
+    def toggle_status(self, prediction_id):
+        """Flip active/inactive; returns the updated row or None if missing"""
+        cursor = self._write(
+            "UPDATE predictions SET status = CASE status "
+            "WHEN 'active' THEN 'inactive' ELSE 'active' END WHERE id = ?",
+            (prediction_id,)
+        )
+        return self.get(prediction_id) if cursor.rowcount else None
+
+    def delete(self, prediction_id):
+        """Remove a prediction; returns whether it existed"""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM predictions WHERE id = ?", (prediction_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            # A settled prediction leaves the statistics with it
+            stats.apply(conn, dict(row), row["result"], None)
+            conn.execute("DELETE FROM predictions WHERE id = ?", (prediction_id,))
+            self._bump(conn)
+        return True
+
+    def settle(self, prediction_id, result):
+        """Record won/lost/void (None to unsettle); returns the row or None if missing
+
+        The statistics aggregates are updated in the same transaction, so
+        they always match the results stored on the rows.
+        """
+        if result is not None and result not in stats.RESULTS:
+            raise ValueError(f"result must be one of {', '.join(stats.RESULTS)}")
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM predictions WHERE id = ?", (prediction_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["result"] != result:
+                stats.apply(conn, dict(row), row["result"], result)
+                conn.execute(
+                    "UPDATE predictions SET result = ?, settled_at = ? WHERE id = ?",
+                    (result, datetime.now().strftime(TIMESTAMP_FORMAT) if result else None,
+                     prediction_id)
+                )
+                self._bump(conn)
+        return self.get(prediction_id)
+
+    def get_many(self, prediction_ids):
+        """{id: row} for those of `prediction_ids` that exist"""
+        found = {}
+        ids = list(prediction_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT * FROM predictions WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update((row["id"], dict(row)) for row in rows)
+        return found
+
+    # Odds
+
+    def add_quotes(self, quotes):
+        """Upsert (event_id, market, outcome, bookmaker, price) tuples in one transaction
+
+        They all get the next odds sequence number, which tells each
+        worker's surebet engine which books to re-price.
+        """
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'odds_seq'"
+            )
+            seq = int(conn.execute("SELECT value FROM store_meta WHERE key = 'odds_seq'").fetchone()[0])
+            conn.executemany(
+                "INSERT OR REPLACE INTO odds_quotes "
+                "(event_id, market, outcome, bookmaker, price, seq, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*quote, seq, now) for quote in quotes]
+            )
+            self._bump(conn)
+        return seq
+
+    def odds_changes(self, since):
+        """Best prices of the books changed after odds sequence `since`
+
+        Returns ({(event_id, market): {outcome: (price, bookmaker)}}, latest
+        sequence). Only the changed books' quotes are read, through the
+        seq index and the primary key.
+        """
+        conn = self._connection()
+        seq = int(conn.execute("SELECT value FROM store_meta WHERE key = 'odds_seq'").fetchone()[0])
+        best = {}
+        if seq <= since:
+            return best, seq
+        # SQLite returns the bookmaker from the row holding MAX(price)
+        rows = conn.execute(
+            "WITH changed AS ("
+            "    SELECT DISTINCT event_id, market FROM odds_quotes WHERE seq > ? AND seq <= ?"
+            ") "
+            "SELECT q.event_id, q.market, q.outcome, q.bookmaker, MAX(q.price) "
+            "FROM changed JOIN odds_quotes q "
+            "ON q.event_id = changed.event_id AND q.market = changed.market "
+            "GROUP BY q.event_id, q.market, q.outcome",
+            (since, seq)
+        )
+        for event_id, market, outcome, bookmaker, price in rows:
+            best.setdefault((event_id, market), {})[outcome] = (price, bookmaker)
+        return best, seq
+
+    # Statistics
+
+    def stats_rows(self):
+        """Every statistics aggregate row; see stats.py"""
+        rows = self._connection().execute("SELECT * FROM prediction_stats")
+        return [dict(row) for row in rows]
+
+    def rebuild_stats(self):
+        """Recompute the aggregates from every settled row, e.g. after hand edits"""
+        with self.transaction() as conn:
+            stats.rebuild(conn)
+            self._bump(conn)
@@ -0,0 +1,278 @@
+"""Surebet (arbitrage) detection over odds from many bookmakers.
+
+Quotes - one price per event, market, outcome and bookmaker - are
+stored in the prediction database, each stamped with the sequence
+number of the ingest that last changed it. Every worker keeps the best
+price per outcome for every (event, market) book in a columnar matrix
+with one row per book and one column per outcome. On a read it pulls
+only the books whose quotes changed since its last sequence number and
+re-evaluates just those rows.
+
+For a book with best prices p1..pn the implied probability sum is
+S = 1/p1 + ... + 1/pn. S < 1 is a surebet: staking (1/pi)/S of the
+bankroll on each outcome returns 1/S whatever happens, a profit of
+1/S - 1. The matrix work is vectorized with NumPy when it is installed
+and done row by row otherwise, with the same results.
+"""
+import math
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the pure-Python path gives the same answers
+    np = None
+
+from models import SQLITE_MAX_INT
+
+# Market -> its outcomes, which must all be priced for a book to count
+MARKETS = {
+    "1x2": ("home", "draw", "away"),
+    "draw_no_bet": ("home", "away"),
+    "over_under_2_5": ("over", "under"),
+    "btts": ("yes", "no"),
+}
+MAX_OUTCOMES = max(len(outcomes) for outcomes in MARKETS.values())
+
+ODDS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds_quotes (
+    event_id INTEGER NOT NULL,
+    market TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    bookmaker TEXT NOT NULL,
+    price REAL NOT NULL,
+    seq INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (event_id, market, outcome, bookmaker)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_odds_quotes_seq ON odds_quotes (seq);
+"""
+
+
+def validate_quote(quote):
+    """(event_id, market, outcome, bookmaker, price) from a quote dict, or ValueError"""
+    if not isinstance(quote, dict):
+        raise ValueError("expected an object")
+    missing = [key for key in ("event_id", "market", "outcome", "bookmaker", "price")
+               if quote.get(key) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    market, outcome = str(quote["market"]), str(quote["outcome"])
+    if market not in MARKETS:
+        raise ValueError(f"market must be one of {', '.join(MARKETS)}")
+    if outcome not in MARKETS[market]:
+        raise ValueError(f"outcome for {market} must be one of {', '.join(MARKETS[market])}")
+    try:
+        event_id, price = int(quote["event_id"]), float(quote["price"])
+    except (TypeError, ValueError):
+        raise ValueError("event_id must be an integer and price a number")
+    if not 1 <= event_id <= SQLITE_MAX_INT:
+        raise ValueError("event_id is not a prediction id")
+    if not price > 1 or math.isinf(price):
+        raise ValueError("price must be decimal odds above 1")
+    return event_id, market, outcome, str(quote["bookmaker"]).strip(), price
+
+
+def surebet_args_from(args):
+    """surebets() keyword arguments from /api/surebets query parameters.
+
+    min_profit is a non-negative percentage, bankroll an amount to
+    split, market a comma-separated list of MARKETS. Raises ValueError
+    for bad values.
+    """
+    def number(name):
+        value = args.get(name)
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+
+    markets = [market.strip() for market in args.get("market", "").split(",") if market.strip()]
+    unknown = [market for market in markets if market not in MARKETS]
+    if unknown:
+        raise ValueError(f"unknown markets: {', '.join(unknown)}")
+    bankroll = number("bankroll")
+    if bankroll is not None and bankroll <= 0:
+        raise ValueError("bankroll must be positive")
+    min_profit = number("min_profit") or 0.0
+    if min_profit < 0:
+        # Below zero would list books that lose money (and -100 divides by zero)
+        raise ValueError("min_profit must not be negative")
+    return {
+        "min_profit": min_profit,
+        "bankroll": bankroll,
+        "markets": markets or None,
+    }
+
+
+class OddsMatrix:
+    """Best prices per book, one row per (event, market), one column per outcome
+
+    Missing prices are 0. implied[row] holds the row's implied probability
+    sum, or infinity while any of its outcomes is unpriced.
+    """
+
+    def __init__(self, capacity=1024):
+        self.rows = {}       # (event_id, market) -> row
+        self.keys = []       # row -> (event_id, market)
+        self.bookmakers = []  # row -> [bookmaker per outcome]
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        if np is not None:
+            prices = np.zeros((capacity, MAX_OUTCOMES))
+            implied = np.full(capacity, np.inf)
+            if hasattr(self, "prices"):
+                prices[:len(self.keys)] = self.prices[:len(self.keys)]
+                implied[:len(self.keys)] = self.implied[:len(self.keys)]
+        else:
+            prices = array("d", bytes(8 * capacity * MAX_OUTCOMES))
+            implied = array("d", [math.inf]) * capacity
+            if hasattr(self, "prices"):
+                used = len(self.keys)
+                prices[:used * MAX_OUTCOMES] = self.prices[:used * MAX_OUTCOMES]
+                implied[:used] = self.implied[:used]
+        self.prices, self.implied, self.capacity = prices, implied, capacity
+
+    def row(self, key):
+        """Row of book `key`, added empty if new"""
+        row = self.rows.get(key)
+        if row is None:
+            if len(self.keys) == self.capacity:
+                self._allocate(self.capacity * 2)
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.bookmakers.append([None] * MAX_OUTCOMES)
+        return row
+
+    def set_price(self, row, column, price, bookmaker):
+        if np is not None:
+            self.prices[row, column] = price
+        else:
+            self.prices[row * MAX_OUTCOMES + column] = price
+        self.bookmakers[row][column] = bookmaker
+
+    def price(self, row, column):
+        if np is not None:
+            return float(self.prices[row, column])
+        return self.prices[row * MAX_OUTCOMES + column]
+
+    def evaluate(self, rows):
+        """Recompute the implied probability sums of `rows`"""
+        if not rows:
+            return
+        if np is not None:
+            rows = np.fromiter(rows, dtype=np.intp, count=len(rows))
+            widths = np.array([len(MARKETS[self.keys[row][1]]) for row in rows])
+            prices = self.prices[rows]
+            needed = np.arange(MAX_OUTCOMES) < widths[:, None]
+            priced = prices > 0
+            inverse = np.divide(1.0, prices, out=np.zeros_like(prices), where=priced & needed)
+            sums = inverse.sum(axis=1)
+            sums[(needed & ~priced).any(axis=1)] = np.inf
+            self.implied[rows] = sums
+            return
+        for row in rows:
+            width = len(MARKETS[self.keys[row][1]])
+            start = row * MAX_OUTCOMES
+            prices = self.prices[start:start + width]
+            self.implied[row] = (
+                sum(1.0 / price for price in prices) if all(prices) else math.inf
+            )
+
+    def below(self, threshold):
+        """Rows whose implied probability sum is under `threshold`, best first"""
+        used = len(self.keys)
+        if np is not None:
+            implied = self.implied[:used]
+            rows = np.flatnonzero(implied < threshold)
+            return rows[np.argsort(implied[rows], kind="stable")].tolist()
+        rows = [row for row in range(used) if self.implied[row] < threshold]
+        return sorted(rows, key=lambda row: self.implied[row])
+
+
+class SurebetEngine:
+    """Keeps a worker's OddsMatrix in step with the store and lists surebets"""
+
+    def __init__(self, store):
+        self.store = store
+        self.matrix = OddsMatrix()
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-price the books changed since the last refresh; returns how many"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed, seq = self.store.odds_changes(self.seq)
+        self.seq = max(self.seq, seq)
+        matrix, dirty = self.matrix, set()
+        for (event_id, market), best in changed.items():
+            row = matrix.row((event_id, market))
+            for column, outcome in enumerate(MARKETS[market]):
+                price, bookmaker = best.get(outcome, (0.0, None))
+                matrix.set_price(row, column, price, bookmaker)
+            dirty.add(row)
+        matrix.evaluate(sorted(dirty))
+        return len(dirty)
+
+    def surebets(self, min_profit=0.0, bankroll=None, markets=None):
+        """Current surebets on active predictions, most profitable first
+
+        `min_profit` is in percent of the total stake. With a `bankroll`
+        each leg also gets the amount to stake, rounded to cents.
+        """
+        with self._lock:
+            self._refresh()
+            return self._list(min_profit, bankroll, markets)
+
+    def _list(self, min_profit, bankroll, markets):
+        matrix = self.matrix
+        threshold = 1.0 / (1.0 + min_profit / 100.0)
+        found = []
+        for row in matrix.below(threshold):
+            event_id, market = matrix.keys[row]
+            if markets and market not in markets:
+                continue
+            implied = float(matrix.implied[row])
+            legs = []
+            for column, outcome in enumerate(MARKETS[market]):
+                price = matrix.price(row, column)
+                share = (1.0 / price) / implied
+                leg = {
+                    "outcome": outcome,
+                    "bookmaker": matrix.bookmakers[row][column],
+                    "price": price,
+                    "stake_share": round(share, 4),
+                }
+                if bankroll is not None:
+                    leg["stake"] = round(bankroll * share, 2)
+                legs.append(leg)
+            found.append({
+                "event_id": event_id,
+                "market": market,
+                "implied_probability": round(implied, 4),
+                "margin": round((1.0 - implied) * 100, 2),
+                "profit": round((1.0 / implied - 1.0) * 100, 2),
+                "legs": legs,
+            })
+
+        # Events are predictions; drop paused and deleted ones
+        events = self.store.get_many({surebet["event_id"] for surebet in found})
+        return [
+            {**surebet, **{key: events[surebet["event_id"]][key]
+                           for key in ("match", "league", "date", "time")}}
+            for surebet in found
+            if events.get(surebet["event_id"], {}).get("status") == "active"
+        ]
+
+    def best_by_event(self):
+        """{event_id: its most profitable surebet}"""
+        best = {}
+        for surebet in self.surebets():
+            best.setdefault(surebet["event_id"], surebet)
+        return best
@@ -0,0 +1,13 @@
+"""Shared Jinja setup for the SureBet Pro apps"""
+
+
+def precompile_templates(app):
+    """Compile every page template once at startup.
+
+    Flask keeps compiled templates in the Jinja cache, so loading them here
+    means requests only ever render - nothing is lexed or parsed per hit.
+    """
+    env = app.jinja_env
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+    return env
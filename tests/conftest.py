@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the checkout, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from factory import create_app  # noqa: E402
+from store import PredictionStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty PredictionStore in a scratch database"""
+    return PredictionStore(str(tmp_path / "surebet.db"), seed=[])
+
+
+def scratch_config(tmp_path, **config):
+    """create_app() config keeping every database in tmp_path"""
+    return {
+        "SUREBET_DB": str(tmp_path / "surebet.db"),
+        "SUREBET_ANALYTICS_DB": str(tmp_path / "analytics.db"),
+        "SUREBET_VISIT_LOG": str(tmp_path / "visits"),
+        "SUREBET_METRICS_DB": str(tmp_path / "metrics.db"),
+        "SUREBET_PROFILE_DB": str(tmp_path / "profile.db"),
+        **config,
+    }
+
+
+@pytest.fixture
+def client(tmp_path):
+    """A test client for the public app"""
+    return create_app(scratch_config(tmp_path)).test_client()
+
+
+@pytest.fixture
+def admin_client(tmp_path):
+    """A test client for the admin app"""
+    return create_app(scratch_config(tmp_path, ADMIN=True)).test_client()
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.mark.parametrize("query", [
+    "from=2025-06-10T00:00:00%2B02:00",
+    "from=2025-06-10T00:00:00Z&to=2025-06-11&granularity=hour",
+])
+def test_visitor_series_accepts_utc_offsets(admin_client, query):
+    response = admin_client.get(f"/api/visitors?{query}")
+    assert response.status_code == 200
+    series = response.get_json()["data"]["series"]
+    # Converted to local wall-clock time like the buckets
+    assert "+" not in series["from"]
+
+
+@pytest.mark.parametrize("query", [
+    "granularity=day&to=0001-01-01",
+    "from=0001-01-01T00:00:00%2B14:00",
+    "to=9999-12-31T23:00:00-14:00",
+    "from=yesterday",
+    "from=2025-06-11&to=2025-06-10",
+])
+def test_visitor_series_rejects_bad_ranges(admin_client, query):
+    response = admin_client.get(f"/api/visitors?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
@@ -0,0 +1,47 @@
+import pytest
+from flask import Flask
+
+from assets import brotli, preferred_encoding
+
+app = Flask(__name__)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1.0, br;q=0.1", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0.8, gzip;q=0.8", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+    ("*", "br"),
+    ("identity;q=1, gzip;q=0.5", None),
+])
+def test_preferred_encoding_follows_q_values(header, expected):
+    with app.test_request_context(headers={"Accept-Encoding": header}):
+        assert preferred_encoding({"br", "gzip"}) == expected
+
+
+def test_preferred_encoding_only_offers_what_is_available():
+    with app.test_request_context(headers={"Accept-Encoding": "br;q=1, gzip;q=0.5"}):
+        assert preferred_encoding({"gzip"}) == "gzip"
+        assert preferred_encoding(set()) is None
+
+
+def test_assets_revalidate_with_a_weak_etag(client):
+    url = client.application.extensions["assets"].url_for("css/main.css")
+    tags = set()
+    for encoding in ("identity", "gzip", "br") if brotli else ("identity", "gzip"):
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding", "identity") == encoding
+        tags.add(response.headers["ETag"])
+    (etag,) = tags
+    assert etag.startswith('W/"')
+    for sent in (etag, etag[2:]):
+        assert client.get(url, headers={"If-None-Match": sent}).status_code == 304
+
+
+def test_static_files_are_only_served_fingerprinted(client):
+    assert client.get("/static/css/main.css").status_code == 404
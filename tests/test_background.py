@@ -0,0 +1,19 @@
+import threading
+
+from background import PerProcessThread
+
+
+def test_per_process_thread_starts_once_and_restarts_when_asked():
+    release = threading.Event()
+    setups = []
+    once = PerProcessThread(release.wait, "test-once", setup=lambda: setups.append("once"))
+    again = PerProcessThread(lambda: None, "test-again", setup=lambda: setups.append("again"), restart=True)
+    assert not once.started()
+    for _ in range(3):
+        once.ensure()
+        again.ensure()
+        again.thread.join()
+    release.set()
+    assert once.started() and again.started()
+    assert setups.count("once") == 1
+    assert setups.count("again") == 3
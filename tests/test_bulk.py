@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import bulk
+from bulk import export_csv, export_ndjson, guess_format, parse_upload, validate_row
+
+ROW = {"match": "Ajax vs PSV", "league": "Eredivisie", "date": "2025-06-10", "time": "18:30",
+       "prediction": "BTTS", "odds": "1.7", "confidence": "Medium"}
+
+HEADER = "match,league,date,time,prediction,odds,confidence"
+
+
+def test_csv_keeps_good_rows_and_reports_bad_lines():
+    data = "\n".join([
+        HEADER,
+        "Ajax vs PSV,Eredivisie,2025-06-10,18:30,BTTS,1.7,Medium",
+        "Ajax vs PSV,Eredivisie,10/06/2025,18:30,BTTS,1.7,Medium",
+        "Ajax vs PSV,Eredivisie,2025-06-10,18:30,BTTS,0.9,Medium",
+        '"Feyenoord vs AZ, replay",Eredivisie,2025-06-11,20:00,Home Win,2,High',
+    ]).encode("utf-8-sig")
+    rows, errors = parse_upload(data, "csv")
+    assert [row["match"] for row in rows] == ["Ajax vs PSV", "Feyenoord vs AZ, replay"]
+    assert rows[0]["odds"] == "1.70" and rows[0]["status"] == "active"
+    assert [error["line"] for error in errors] == [3, 4]
+    assert "YYYY-MM-DD" in errors[0]["error"]
+
+
+def test_ndjson_reports_invalid_json_and_non_objects():
+    lines = [json.dumps(ROW), "", "{not json", "[1, 2]", json.dumps({**ROW, "confidence": "Sure"})]
+    rows, errors = parse_upload("\n".join(lines).encode(), "ndjson")
+    assert len(rows) == 1
+    assert [error["line"] for error in errors] == [3, 4, 5]
+    assert errors[0]["error"].startswith("invalid JSON")
+    assert errors[1]["error"] == "expected an object"
+    assert "confidence" in errors[2]["error"]
+
+
+@pytest.mark.parametrize("data, fmt", [
+    (b"\xff\xfe", "csv"),
+    (b"", "csv"),
+    (b"{}", "xml"),
+])
+def test_unusable_uploads_raise(data, fmt):
+    with pytest.raises(ValueError):
+        parse_upload(data, fmt)
+
+
+def test_row_limit(monkeypatch):
+    monkeypatch.setattr(bulk, "MAX_IMPORT_ROWS", 2)
+    with pytest.raises(ValueError, match="at most 2 rows"):
+        parse_upload("\n".join([json.dumps(ROW)] * 3).encode(), "ndjson")
+
+
+@pytest.mark.parametrize("filename, mimetype, expected", [
+    ("week.CSV", "", "csv"),
+    ("week.jsonl", "", "ndjson"),
+    ("upload", "application/x-ndjson", "ndjson"),
+    ("week.xlsx", "", None),
+])
+def test_guess_format(filename, mimetype, expected):
+    assert guess_format(filename, mimetype) == expected
+
+
+def test_exports_round_trip(monkeypatch):
+    monkeypatch.setattr(bulk, "EXPORT_CHUNK_SIZE", 64)
+    rows = [{**validate_row(ROW), "id": n} for n in range(5)]
+    columns = ["match", "league", "date", "time", "prediction", "odds", "confidence", "status"]
+    chunks = list(export_csv(rows, columns=columns))
+    assert len(chunks) > 1
+    parsed, errors = parse_upload("".join(chunks).encode(), "csv")
+    assert errors == [] and len(parsed) == 5
+    lines = "".join(export_ndjson(rows)).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(5))
@@ -0,0 +1,86 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response
+
+from assets import brotli
+from compression import Compression, compress, compress_stream
+
+ENCODINGS = ["gzip", pytest.param("br", marks=pytest.mark.skipif(brotli is None, reason="needs brotli"))]
+
+DECOMPRESS = {"gzip": gzip.decompress, "br": lambda data: brotli.decompress(data)}
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_stream_decompresses_to_the_joined_chunks(encoding):
+    chunks = ["id,match\n", b"1,Ajax vs PSV\n", "", "2,Ñandú FC vs Club\n" * 500]
+    data = b"".join(compress_stream(iter(chunks), encoding))
+    expected = b"".join(c.encode("utf-8") if isinstance(c, str) else c for c in chunks)
+    assert DECOMPRESS[encoding](data) == expected
+    assert DECOMPRESS[encoding](compress(expected, encoding)) == expected
+
+
+def test_gzip_stream_is_a_single_member():
+    data = b"".join(compress_stream(["a" * 1000, "b" * 1000], "gzip"))
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(data) == b"a" * 1000 + b"b" * 1000
+    assert decompressor.eof and decompressor.unused_data == b""
+
+
+def test_closing_the_stream_closes_the_source():
+    closed = []
+
+    def source():
+        try:
+            yield "x" * 100
+            yield "y" * 100
+        finally:
+            closed.append(True)
+
+    stream = compress_stream(source(), "gzip")
+    next(stream)
+    stream.close()
+    assert closed == [True]
+
+
+@pytest.fixture
+def bare_client():
+    """A bare app with only the compression hook"""
+    app = Flask(__name__)
+    Compression(app)
+
+    @app.route("/big")
+    def big():
+        return Response("x" * 5000, mimetype="text/plain")
+
+    @app.route("/small")
+    def small():
+        return Response("x" * 100, mimetype="text/plain")
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"{n}\n" for n in range(2000)), mimetype="text/csv")
+
+    @app.route("/events")
+    def events():
+        return Response(iter(["data: 1\n\n"]), mimetype="text/event-stream")
+
+    return app.test_client()
+
+
+def test_middleware_compresses_what_is_worth_it(bare_client):
+    client = bare_client
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()) == b"x" * 5000
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in streamed.headers
+    assert gzip.decompress(streamed.get_data()) == "".join(f"{n}\n" for n in range(2000)).encode()
+
+    for path in ("/small", "/events"):
+        assert "Content-Encoding" not in client.get(path, headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/big").headers
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from conditional import http_date
+
+
+@pytest.mark.parametrize("path", ["/", "/about", "/predictions", "/statistics",
+                                  "/api/predictions", "/api/statistics", "/api/surebets"])
+def test_unchanged_pages_answer_304(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag, modified = first.headers["ETag"], first.headers.get("Last-Modified")
+    assert first.headers["Cache-Control"] in ("no-cache, public", "public, no-cache")
+
+    repeat = client.get(path, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b""
+    assert repeat.headers["ETag"] == etag
+    if modified is not None:
+        assert client.get(path, headers={"If-Modified-Since": modified}).status_code == 304
+    assert client.get(path, headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+
+def test_a_change_invalidates_the_etag(client):
+    etag = client.get("/api/predictions").headers["ETag"]
+    store = client.application.extensions["services"].predictions
+    store.toggle_status(1)
+    response = client.get("/api/predictions", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_last_modified_is_when_the_data_changed(client):
+    store = client.application.extensions["services"].predictions
+    expected = http_date(store.updated_at()).replace(microsecond=0)
+    modified = client.get("/api/predictions").last_modified
+    assert modified == expected
+
+
+def test_http_date_treats_naive_times_as_local():
+    naive = datetime(2025, 6, 10, 12, 0)
+    assert http_date(naive) == naive.astimezone().astimezone(timezone.utc)
+    aware = datetime(2025, 6, 10, 12, 0, tzinfo=timezone.utc)
+    assert http_date(aware) == aware
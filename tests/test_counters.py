@@ -0,0 +1,70 @@
+import sys
+import threading
+
+import pytest
+
+from counters import ShardedCounter, ShardedCounters
+
+THREADS = 8
+INCREMENTS = 20000
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    # Switch threads every few bytecodes so unguarded += would lose updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(target):
+    start = threading.Barrier(THREADS)
+
+    def worker(number):
+        start.wait()
+        target(number)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_sharded_counter_is_exact_under_threads():
+    counter = ShardedCounter()
+    seen = []
+
+    def bump(number):
+        for i in range(INCREMENTS):
+            counter.add()
+            if number == 0 and i % 1000 == 0:
+                seen.append(counter.value())
+
+    run_threads(bump)
+    assert counter.value() == THREADS * INCREMENTS
+    # Reads while others write only ever go up
+    assert seen == sorted(seen)
+
+
+def test_sharded_counters_are_exact_under_threads():
+    counters = ShardedCounters()
+    pages = ["Home", "Predictions", "Statistics", "About"]
+
+    def bump(number):
+        for i in range(INCREMENTS):
+            counters.add(pages[i % len(pages)])
+            if i % 5000 == 0:
+                counters.snapshot()
+
+    run_threads(bump)
+    assert counters.snapshot() == {page: THREADS * INCREMENTS // len(pages) for page in pages}
+
+
+def test_amounts_add_up():
+    counters = ShardedCounters()
+    counters.add("a", 3)
+    counters.add("a", -1)
+    counters.add(("b", ()), 2.5)
+    assert counters.snapshot() == {"a": 2, ("b", ()): 2.5}
@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from hll import DEFAULT_PRECISION, HyperLogLog, position
+
+STANDARD_ERROR = 1.04 / math.sqrt(1 << DEFAULT_PRECISION)
+
+
+@pytest.mark.parametrize("count", [0, 1, 1000, 50000, 200000])
+def test_estimate_within_error_bound(count):
+    sketch = HyperLogLog()
+    for n in range(count):
+        sketch.add(f"198.51.{n}|agent")
+    # Four standard errors: a deterministic hash makes this pass or fail for good
+    assert abs(sketch.count() - count) <= 4 * STANDARD_ERROR * count
+
+
+def test_duplicates_do_not_count():
+    sketch = HyperLogLog()
+    for _ in range(3):
+        for n in range(500):
+            sketch.add(str(n))
+    assert sketch.count() == pytest.approx(500, rel=4 * STANDARD_ERROR)
+
+
+def test_merge_equals_one_sketch_of_the_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for n in range(20000):
+        (left if n % 3 else right).add(str(n))
+        union.add(str(n))
+    assert left.merge(right).to_bytes() == union.to_bytes()
+
+
+def test_batched_positions_match_add():
+    added, batched = HyperLogLog(), HyperLogLog()
+    positions = {}
+    for n in range(5000):
+        added.add(str(n))
+        index, rank = position(str(n))
+        positions[index] = max(positions.get(index, 0), rank)
+    batched.update(positions)
+    assert batched.to_bytes() == added.to_bytes()
+    assert HyperLogLog.from_bytes(added.to_bytes()).count() == added.count()
+
+
+def test_precision_must_match():
+    with pytest.raises(ValueError):
+        HyperLogLog(p=10).merge(HyperLogLog(p=12))
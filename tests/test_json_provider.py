@@ -0,0 +1,51 @@
+import datetime
+import decimal
+import math
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider
+
+OBJECTS = [
+    {"b": 1, "a": [1.5, None, True], "nested": {"z": "x", "y": 2}},
+    {"match": "Atlético Madrid vs Málaga", "flag": "🎯"},
+    {"when": datetime.datetime(2025, 6, 10, 15, 0), "day": datetime.date(2025, 6, 10)},
+    {"odds": decimal.Decimal("1.85"), "big": 2 ** 70},
+    [],
+]
+
+
+@pytest.fixture(params=[True, False], ids=["ensure_ascii", "utf8"])
+def providers(request):
+    app = Flask(__name__)
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+    fast.ensure_ascii = default.ensure_ascii = request.param
+    # Providers only keep a weak reference to their app
+    with app.app_context():
+        yield fast, default
+
+
+@pytest.mark.parametrize("obj", OBJECTS)
+def test_dumps_matches_flask(providers, obj):
+    fast, default = providers
+    assert fast.dumps(obj) == default.dumps(obj)
+    assert fast.dumps(obj, indent=2) == default.dumps(obj, indent=2)
+    assert fast.dumps_compact(obj) == default.dumps(obj, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("obj", OBJECTS)
+def test_responses_match_flask(providers, obj):
+    fast, default = providers
+    assert fast.response(obj).get_data() == default.response(obj).get_data()
+
+
+def test_loads_matches_the_stdlib(providers):
+    fast, default = providers
+    text = '{"big": 18446744073709551616, "small": -9223372036854775809, "nan": NaN}'
+    loaded = fast.loads(text)
+    assert loaded["big"] == 2 ** 64 and isinstance(loaded["big"], int)
+    assert loaded["small"] == -2 ** 63 - 1
+    assert math.isnan(loaded["nan"])
+    assert loaded.keys() == default.loads(text).keys()
@@ -0,0 +1,29 @@
+import pytest
+
+from live import Broadcaster, default_max_clients
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, 3),
+    ({"GUNICORN_THREADS": "8"}, 7),
+    ({"GUNICORN_WORKER_CLASS": "sync"}, 0),
+    # gunicorn runs this as gthread
+    ({"GUNICORN_WORKER_CLASS": "sync", "GUNICORN_THREADS": "4"}, 3),
+    ({"GUNICORN_WORKER_CLASS": "gevent"}, None),
+])
+def test_default_max_clients(monkeypatch, env, expected):
+    monkeypatch.delenv("GUNICORN_WORKER_CLASS", raising=False)
+    monkeypatch.delenv("GUNICORN_THREADS", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert default_max_clients() == expected
+
+
+def test_full_broadcaster_turns_clients_away():
+    live = Broadcaster([], max_clients=1)
+    first = live.subscribe(set())
+    assert first is not None
+    assert live.subscribe(set()) is None
+    live.unsubscribe(first)
+    assert live.subscribe(set()) is not None
+    assert Broadcaster([], max_clients=0).subscribe(set()) is None
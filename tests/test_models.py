@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from models import Confidence, Prediction, Status, format_odds
+
+FORM = {"match": " Ajax vs PSV ", "league": "Eredivisie", "date": "2025-06-10", "time": "18:30",
+        "prediction": "BTTS", "odds": "1.7", "confidence": "Medium"}
+
+
+def test_parse_cleans_and_types_fields():
+    record = Prediction.parse(FORM)
+    assert record.match == "Ajax vs PSV"
+    assert record.kickoff == datetime(2025, 6, 10, 18, 30)
+    assert record.odds == 1.7
+    assert record.confidence is Confidence.MEDIUM
+    assert record.status is Status.ACTIVE
+    assert record.to_row() == {**FORM, "match": "Ajax vs PSV", "odds": "1.70", "status": "active"}
+
+
+def test_parse_keeps_optional_fields():
+    record = Prediction.parse({**FORM, "status": "inactive", "created_at": "2025-06-09 10:30:00"})
+    assert record.status is Status.INACTIVE
+    assert record.to_row()["created_at"] == "2025-06-09 10:30:00"
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"match": "  "}, "missing match"),
+    ({"league": None, "odds": None}, "missing league, odds"),
+    ({"date": "10/06/2025"}, "is not YYYY-MM-DD"),
+    ({"date": "2025-02-30"}, "is not YYYY-MM-DD"),
+    ({"time": "25:00"}, "is not HH:MM"),
+    ({"odds": "evens"}, "is not a number"),
+    ({"odds": "1"}, "greater than 1"),
+    ({"odds": "nan"}, "greater than 1"),
+    ({"odds": "inf"}, "greater than 1"),
+    ({"confidence": "high"}, "confidence must be one of"),
+    ({"status": "paused"}, "status must be one of"),
+    ({"created_at": "yesterday"}, "created_at"),
+])
+def test_parse_rejects(changes, message):
+    with pytest.raises(ValueError, match=message):
+        Prediction.parse({**FORM, **changes})
+
+
+def test_parse_needs_a_mapping():
+    with pytest.raises(ValueError, match="expected an object"):
+        Prediction.parse(["Ajax vs PSV"])
+
+
+def test_row_round_trip():
+    row = {**Prediction.parse(FORM).to_row(), "id": 3, "created_at": "2025-06-09 10:30:00",
+           "result": "won", "settled_at": "2025-06-10 21:00:00"}
+    record = Prediction.from_row(row)
+    assert record.as_dict() == row
+    assert Prediction.from_row(row) == record
+
+
+@pytest.mark.parametrize("odds, text", [(1.7, "1.70"), (2.0, "2.00"), (1.333, "1.333")])
+def test_format_odds(odds, text):
+    assert format_odds(odds) == text
@@ -0,0 +1,98 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+import page_cache
+from page_cache import PageCache
+
+
+def cached_app(cache, render):
+    """A bare app serving /<name> through `cache`, rendering with render(name)"""
+    app = Flask(__name__)
+
+    @app.route("/<name>")
+    def page(name):
+        return cache.serve(lambda: render(name), key=name)
+
+    return app
+
+
+@pytest.fixture
+def rendered():
+    return []
+
+
+def test_second_request_is_a_hit(rendered):
+    cache = PageCache()
+    client = cached_app(cache, lambda name: rendered.append(name) or f"<p>{name}</p>").test_client()
+    assert client.get("/a").headers["X-Cache"] == "MISS"
+    response = client.get("/a")
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.get_data() == b"<p>a</p>"
+    assert rendered == ["a"]
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted(rendered):
+    cache = PageCache(max_entries=2)
+    client = cached_app(cache, lambda name: rendered.append(name) or name).test_client()
+    for path in ("/a", "/b", "/a", "/c"):
+        client.get(path)
+    # /a was used after /b, so /b made room for /c
+    assert client.get("/a").headers["X-Cache"] == "HIT"
+    assert client.get("/b").headers["X-Cache"] == "MISS"
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_new_data_version_rerenders(rendered):
+    versions = [1]
+    cache = PageCache(version=lambda: versions[-1])
+    client = cached_app(cache, lambda name: rendered.append(name) or name).test_client()
+    client.get("/a")
+    client.get("/a")
+    versions.append(2)
+    assert client.get("/a").headers["X-Cache"] == "MISS"
+    assert rendered == ["a", "a"]
+    assert cache.stats()["version"] == 2
+
+
+def test_render_racing_with_bump_is_not_stored(rendered):
+    cache = PageCache()
+
+    def render(name):
+        rendered.append(name)
+        if len(rendered) == 1:
+            # Data changed while this page was being rendered
+            cache.bump()
+        return name
+
+    client = cached_app(cache, render).test_client()
+    assert client.get("/a").get_data() == b"a"
+    assert client.get("/a").headers["X-Cache"] == "MISS"
+    assert client.get("/a").headers["X-Cache"] == "HIT"
+    assert rendered == ["a", "a"]
+
+
+def test_variants_are_compressed_once(monkeypatch, rendered):
+    compressed = []
+    original = page_cache.compress
+    monkeypatch.setattr(page_cache, "compress",
+                        lambda body, encoding: compressed.append(encoding) or original(body, encoding))
+    cache = PageCache()
+    client = cached_app(cache, lambda name: "x" * 5000).test_client()
+    for _ in range(3):
+        response = client.get("/a", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()) == b"x" * 5000
+    assert client.get("/a").get_data() == b"x" * 5000
+    assert compressed == ["gzip"]
+
+
+def test_entries_revalidate_with_a_weak_etag():
+    cache = PageCache()
+    client = cached_app(cache, lambda name: name).test_client()
+    etag = client.get("/a").headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/a", headers={"If-None-Match": etag}).status_code == 304
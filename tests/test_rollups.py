@@ -0,0 +1,31 @@
+from rollups import RingSeries
+
+
+def test_slots_are_reused_by_newer_buckets():
+    series = RingSeries(60, 4)
+    series.add(10, 3)
+    series.add(11)
+    assert (series.get(10), series.get(11), series.get(12)) == (3, 1, 0)
+    # Bucket 14 lands in bucket 10's slot and starts from zero
+    series.add(14, 2)
+    assert series.get(14) == 2
+    assert series.get(10) == 0
+    assert series.get(11) == 1
+
+
+def test_stale_buckets_read_as_zero():
+    series = RingSeries(60, 4)
+    series.add(14, 5)
+    # Bucket 10 shares the slot but is older than what it holds
+    assert series.get(10) == 0
+    series.add(10)
+    assert (series.get(10), series.get(14)) == (1, 0)
+
+
+def test_bytes_round_trip():
+    series = RingSeries(3600, 8)
+    for bucket in (3, 3, 9, 100):
+        series.add(bucket)
+    copy = RingSeries(3600, 8, *series.to_bytes())
+    assert [copy.get(bucket) for bucket in (3, 9, 100, 1)] == [2, 1, 1, 0]
+    assert copy.to_bytes() == series.to_bytes()
@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+import stats
+
+PREDICTION = {"league": "Serie A", "prediction": "Home Win", "confidence": "High",
+              "date": "2025-06-10", "odds": "2.50"}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(stats.STATS_SCHEMA)
+    yield conn
+    conn.close()
+
+
+def rows(conn):
+    return {(row["scope"], row["key"]): dict(row) for row in conn.execute("SELECT * FROM prediction_stats")}
+
+
+def test_apply_adds_to_every_scope(conn):
+    stats.apply(conn, PREDICTION, None, "won")
+    found = rows(conn)
+    assert set(found) == {("overall", ""), ("month", "2025-06"), ("league", "Serie A"),
+                          ("market", "Home Win"), ("confidence", "High")}
+    for row in found.values():
+        assert (row["won"], row["lost"], row["void"]) == (1, 0, 0)
+        assert row["odds_total"] == row["returned"] == 2.5
+        assert row["first_date"] == row["last_date"] == "2025-06-10"
+
+
+def test_apply_moves_and_subtracts(conn):
+    stats.apply(conn, PREDICTION, None, "won")
+    stats.apply(conn, PREDICTION, "won", "lost")
+    overall = rows(conn)["overall", ""]
+    assert (overall["won"], overall["lost"]) == (0, 1)
+    assert overall["odds_total"] == 2.5 and overall["returned"] == 0.0
+
+    stats.apply(conn, PREDICTION, "lost", "void")
+    overall = rows(conn)["overall", ""]
+    assert (overall["lost"], overall["void"], overall["odds_total"]) == (0, 1, 0.0)
+
+    stats.apply(conn, PREDICTION, "void", None)
+    for row in rows(conn).values():
+        assert (row["won"], row["lost"], row["void"]) == (0, 0, 0)
+        assert row["odds_total"] == row["returned"] == 0.0
+
+
+def test_apply_same_result_is_a_no_op(conn):
+    stats.apply(conn, PREDICTION, "won", "won")
+    assert rows(conn) == {}
+
+
+def test_dates_only_widen(conn):
+    stats.apply(conn, PREDICTION, None, "won")
+    stats.apply(conn, {**PREDICTION, "date": "2025-06-01"}, None, "lost")
+    stats.apply(conn, {**PREDICTION, "date": "2025-06-01"}, "lost", None)
+    overall = rows(conn)["overall", ""]
+    assert (overall["first_date"], overall["last_date"]) == ("2025-06-01", "2025-06-10")
+
+
+def figures(store):
+    # Rows emptied by subtraction stay behind, a rebuild drops them
+    summaries = {(row["scope"], row["key"]): stats.summarize(row) for row in store.stats_rows()}
+    return {key: summary for key, summary in summaries.items() if summary["settled"]}
+
+
+def test_settle_keeps_aggregates_equal_to_a_rebuild(store):
+    ids = [store.add({**PREDICTION, "match": f"Team {n} vs Team {n + 1}",
+                      "time": "15:00", "odds": f"{1.5 + n / 10:.2f}"})["id"] for n in range(6)]
+    for prediction_id, result in zip(ids, ["won", "lost", "void", "won", "lost", None]):
+        store.settle(prediction_id, result)
+    store.settle(ids[0], "lost")
+    store.settle(ids[1], None)
+    store.delete(ids[3])
+    incremental = figures(store)
+    store.rebuild_stats()
+    assert incremental == figures(store)
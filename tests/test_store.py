@@ -0,0 +1,71 @@
+import base64
+import json
+
+import pytest
+
+from models import SQLITE_MAX_INT
+from store import decode_cursor, encode_cursor, search_args_from
+
+
+def add_predictions(store, count):
+    store.add_many([
+        {"match": f"Team {n} vs Team {n + 1}", "league": "La Liga", "date": "2025-06-10",
+         "time": f"{n % 24:02d}:00", "prediction": "Draw", "odds": f"{1.5 + n / 100:.2f}",
+         "confidence": "Medium"}
+        for n in range(count)
+    ])
+
+
+def test_search_pages_and_counts(store):
+    add_predictions(store, 7)
+    rows, total = store.search(**search_args_from({"per_page": "3", "page": "3", "sort": "id", "order": "asc"}))
+    assert total == 7
+    assert [row["id"] for row in rows] == [7]
+
+
+@pytest.mark.parametrize("args", [
+    {"page": "999999999999999999999"},
+    {"page": "0"},
+    {"per_page": "1000"},
+    {"sort": "nope"},
+])
+def test_search_rejects_bad_pages(store, args):
+    with pytest.raises(ValueError):
+        store.search(**search_args_from(args))
+
+
+def test_cursor_round_trip():
+    row = {"date": "2025-06-10", "time": "15:00", "id": SQLITE_MAX_INT}
+    cursor = encode_cursor(row)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2025-06-10", "15:00", SQLITE_MAX_INT)
+
+
+def test_cursor_pages_cover_every_row_once(store):
+    add_predictions(store, 11)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = store.query(fields=["id"], limit=4, cursor=cursor)
+        seen.extend(row["id"] for row in rows)
+        if cursor is None:
+            break
+    assert sorted(seen) == list(range(1, 12))
+    assert len(seen) == len(set(seen))
+
+
+def raw_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    raw_cursor(["2025-06-10", "15:00"]),
+    raw_cursor(["2025-06-10", "15:00", "7"]),
+    raw_cursor(["2025-06-10", "15:00", True]),
+    raw_cursor(["2025-06-10", "15:00", -1]),
+    raw_cursor(["2025-06-10", "15:00", SQLITE_MAX_INT + 1]),
+    raw_cursor([20250610, "15:00", 7]),
+])
+def test_decode_cursor_rejects(cursor):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        decode_cursor(cursor)
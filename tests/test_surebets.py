@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import surebets
+from surebets import MARKETS, SurebetEngine, surebet_args_from, validate_quote
+
+
+@pytest.fixture(params=["numpy", "array"])
+def vectorized(request, monkeypatch):
+    """Run a test once on the NumPy matrix and once on the array fallback"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        assert surebets.np is not None
+    else:
+        monkeypatch.setattr(surebets, "np", None)
+    return request.param
+
+
+def prediction(number):
+    return {
+        "match": f"Team {number} vs Team {number + 1}", "league": "Premier League",
+        "date": "2025-06-10", "time": "15:00", "prediction": "Home Win",
+        "odds": "1.85", "confidence": "High",
+    }
+
+
+def random_quotes(rng, event_ids, count):
+    quotes = []
+    for _ in range(count):
+        market = rng.choice(list(MARKETS))
+        quotes.append((
+            rng.choice(event_ids), market, rng.choice(MARKETS[market]),
+            f"book{rng.randrange(6)}", round(rng.uniform(1.2, 5.0), 2),
+        ))
+    return quotes
+
+
+def brute_force(quotes, min_profit=0.0):
+    """{(event_id, market): profit %} by scanning every quote, latest price wins"""
+    latest = {}
+    for event_id, market, outcome, bookmaker, price in quotes:
+        latest[event_id, market, outcome, bookmaker] = price
+    best = {}
+    for (event_id, market, outcome, _), price in latest.items():
+        key = (event_id, market, outcome)
+        best[key] = max(best.get(key, 0.0), price)
+    found = {}
+    for event_id, market in {(key[0], key[1]) for key in best}:
+        prices = [best.get((event_id, market, outcome)) for outcome in MARKETS[market]]
+        if None in prices:
+            continue
+        implied = sum(1.0 / price for price in prices)
+        if implied < 1.0 / (1.0 + min_profit / 100.0):
+            found[event_id, market] = round((1.0 / implied - 1.0) * 100, 2)
+    return found
+
+
+def listed(engine, **kwargs):
+    return {(s["event_id"], s["market"]): s["profit"] for s in engine.surebets(**kwargs)}
+
+
+def test_matches_brute_force_scan(store, vectorized):
+    rng = random.Random(7)
+    event_ids = [store.add(prediction(number))["id"] for number in range(40)]
+    engine = SurebetEngine(store)
+    quotes = []
+    # Several ingests, so later refreshes only re-price the changed books
+    for _ in range(5):
+        batch = random_quotes(rng, event_ids, 400)
+        store.add_quotes(batch)
+        quotes.extend(batch)
+        assert listed(engine) == brute_force(quotes)
+    assert listed(engine, min_profit=2.5) == brute_force(quotes, min_profit=2.5)
+    assert brute_force(quotes), "the random quotes should contain some surebets"
+
+
+def test_stakes_split_bankroll(store, vectorized):
+    event_id = store.add(prediction(1))["id"]
+    store.add_quotes([
+        (event_id, "draw_no_bet", "home", "a", 2.2),
+        (event_id, "draw_no_bet", "away", "b", 2.2),
+    ])
+    (surebet,) = SurebetEngine(store).surebets(bankroll=100)
+    assert surebet["profit"] == 10.0
+    assert [leg["stake"] for leg in surebet["legs"]] == [50.0, 50.0]
+
+
+def test_paused_predictions_are_left_out(store, vectorized):
+    event_id = store.add(prediction(1))["id"]
+    store.add_quotes([
+        (event_id, "btts", "yes", "a", 2.5),
+        (event_id, "btts", "no", "b", 2.5),
+    ])
+    engine = SurebetEngine(store)
+    assert len(engine.surebets()) == 1
+    store.toggle_status(event_id)
+    assert engine.surebets() == []
+
+
+@pytest.mark.parametrize("quote", [
+    {"event_id": 10 ** 30, "market": "btts", "outcome": "yes", "bookmaker": "a", "price": 2},
+    {"event_id": 0, "market": "btts", "outcome": "yes", "bookmaker": "a", "price": 2},
+    {"event_id": 1, "market": "btts", "outcome": "draw", "bookmaker": "a", "price": 2},
+    {"event_id": 1, "market": "btts", "outcome": "yes", "bookmaker": "a", "price": 1},
+])
+def test_validate_quote_rejects(quote):
+    with pytest.raises(ValueError):
+        validate_quote(quote)
+
+
+@pytest.mark.parametrize("value", ["-100", "-0.5", "abc"])
+def test_min_profit_must_be_a_non_negative_number(value):
+    with pytest.raises(ValueError):
+        surebet_args_from({"min_profit": value})
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import visitlog
+from visitlog import RECORD, VisitLog, history_args_from
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    # Tiny segments so a few visits cross several files
+    monkeypatch.setattr(visitlog, "SEGMENT_RECORDS", 4)
+    return VisitLog(str(tmp_path / "visits"), max_segments=0)
+
+
+def visits(start, stop):
+    return [{"ip": f"10.0.0.{n}", "user_agent": "pytest", "page": "Home", "time": 1749560400.0 + n}
+            for n in range(start, stop)]
+
+
+def ips(rows):
+    return [int(row["ip"].rsplit(".", 1)[1]) for row in rows]
+
+
+def test_sequence_numbers_map_to_segment_offsets(log):
+    log.append(visits(0, 10))
+    assert log.segments() == [0, 1, 2]
+    assert [os.path.getsize(log._path(segment)) for segment in log.segments()] == \
+        [4 * RECORD.size, 4 * RECORD.size, 2 * RECORD.size]
+    assert log.bounds() == (0, 10)
+    rows = list(log.read(3, 9))
+    assert [row["seq"] for row in rows] == [3, 4, 5, 6, 7, 8]
+    assert ips(rows) == [3, 4, 5, 6, 7, 8]
+    assert ips(log.read(3, 9, descending=True)) == [8, 7, 6, 5, 4, 3]
+    assert ips(log.tail(5)) == [9, 8, 7, 6, 5]
+
+
+def test_appends_fill_the_last_segment_first(log):
+    log.append(visits(0, 3))
+    log.append(visits(3, 6))
+    assert log.segments() == [0, 1]
+    assert ips(log.read(0, 6)) == [0, 1, 2, 3, 4, 5]
+
+
+def test_torn_record_is_ignored_then_truncated(log):
+    log.append(visits(0, 6))
+    with open(log._path(1), "ab") as segment:
+        segment.write(b"\x01" * (RECORD.size // 2))
+    assert log.bounds() == (0, 6)
+    assert ips(log.tail(10)) == [5, 4, 3, 2, 1, 0]
+    log.append(visits(6, 7))
+    assert os.path.getsize(log._path(1)) == 3 * RECORD.size
+    assert [row["seq"] for row in log.read(0, 7)] == list(range(7))
+    assert ips(log.read(6, 7)) == [6]
+
+
+def test_pruning_moves_the_first_sequence_number(log):
+    log.max_segments = 2
+    log.append(visits(0, 14))
+    assert log.segments() == [2, 3]
+    assert log.bounds() == (8, 14)
+    assert ips(log.read(0, 100)) == list(range(8, 14))
+
+
+def test_pages_chain_through_cursors(log):
+    log.append(visits(0, 10))
+    pages, cursor = [], None
+    while True:
+        rows, cursor = log.page(cursor=cursor, limit=3)
+        rows = list(rows)
+        if not rows:
+            break
+        pages.append(ips(rows))
+    assert pages == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    # The last cursor picks up visits logged later
+    log.append(visits(10, 11))
+    assert ips(log.page(cursor=cursor)[0]) == [10]
+
+    rows, cursor = log.page(limit=4, descending=True)
+    assert (ips(rows), cursor) == ([10, 9, 8, 7], 7)
+    rows, cursor = log.page(cursor=2, limit=4, descending=True)
+    assert (ips(rows), cursor) == ([1, 0], None)
+
+
+def test_long_fields_are_cut_on_character_boundaries(log):
+    log.append([{"ip": "1.2.3.4", "user_agent": "é" * 200, "page": "Home", "time": 0.0}])
+    (row,) = log.tail(1)
+    assert row["user_agent"] == "é" * 88
+
+
+@pytest.mark.parametrize("args", [{"order": "up"}, {"cursor": "x"}, {"limit": "-1"},
+                                  {"limit": str(visitlog.MAX_HISTORY_PAGE + 1)}])
+def test_history_args_reject(args):
+    with pytest.raises(ValueError):
+        history_args_from(args)
@@ -0,0 +1,250 @@
+"""Append-only visit log in fixed-size records, split into segment files.
+
+Every visit is one RECORD: the visit time as a float, then the IP, page
+and user agent as zero-padded UTF-8 fields (longer values are cut), 256
+bytes in all. A segment file holds SEGMENT_RECORDS records, so visit
+number `seq` lives at a computable offset of segment seq // SEGMENT_RECORDS
+and sequence numbers double as cursors for paging through history.
+
+Writers from every worker append whole batches under an flock, opening
+a new segment when the current one is full and deleting the oldest once
+there are more than `max_segments`. Readers take no lock: they map a
+segment read-only and unpack records straight from the mapping, so the
+dashboard's tail read touches only the pages it shows and history is
+streamed a record at a time rather than loaded into memory.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development, the thread lock is enough
+    fcntl = None
+
+DEFAULT_LOG_DIR = os.environ.get(
+    "SUREBET_VISIT_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "visits")
+)
+
+# time, ip, page, user agent
+RECORD = struct.Struct("<d48s24s176s")
+
+# 65536 records of 256 bytes make 16 MB segments
+SEGMENT_RECORDS = 65536
+
+# Segments kept; the oldest is deleted past this (0 keeps everything)
+MAX_SEGMENTS = int(os.environ.get("SUREBET_VISIT_LOG_SEGMENTS", "64"))
+
+SEGMENT_NAME = re.compile(r"^visits-(\d{10})\.log$")
+
+# Largest ?limit= for one page of /api/visitors/history, and ?recent= for /admin
+MAX_HISTORY_PAGE = 100000
+MAX_RECENT = 500
+
+
+def _count(args, name, default, maximum):
+    value = args.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if not 0 <= number <= maximum:
+        raise ValueError(f"{name} must be between 0 and {maximum}")
+    return number
+
+
+def history_args_from(args):
+    """history() keyword arguments from /api/visitors/history query parameters.
+
+    cursor is a sequence number from a previous page's X-Next-Cursor,
+    limit the page size and order asc (oldest first) or desc. Raises
+    ValueError for bad values.
+    """
+    order = args.get("order") or "asc"
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    cursor = args.get("cursor") or None
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            raise ValueError("cursor must be an integer")
+    return {
+        "cursor": cursor,
+        "limit": _count(args, "limit", 1000, MAX_HISTORY_PAGE),
+        "descending": order == "desc",
+    }
+
+
+def recent_from(args, default=10):
+    """How many recent visits ?recent= asks for"""
+    return _count(args, "recent", default, MAX_RECENT)
+
+
+def _field(value, size):
+    # Cut on a character boundary so the stored bytes always decode
+    return str(value).encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def pack(visit):
+    """RECORD bytes for a visit dict with ip, user_agent, page and time"""
+    return RECORD.pack(
+        visit["time"],
+        _field(visit["ip"], 48),
+        _field(visit["page"], 24),
+        _field(visit["user_agent"], 176),
+    )
+
+
+def unpack(buffer, offset=0, seq=None):
+    """The visit dict stored at `offset` of `buffer`"""
+    ts, ip, page, user_agent = RECORD.unpack_from(buffer, offset)
+    visit = {
+        "ip": ip.rstrip(b"\0").decode("utf-8"),
+        "user_agent": user_agent.rstrip(b"\0").decode("utf-8"),
+        "timestamp": datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+        "page": page.rstrip(b"\0").decode("utf-8"),
+    }
+    if seq is not None:
+        visit["seq"] = seq
+    return visit
+
+
+class VisitLog:
+    """A directory of visit log segments"""
+
+    def __init__(self, directory=DEFAULT_LOG_DIR, max_segments=MAX_SEGMENTS):
+        self.directory = directory
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"visits-{segment:010d}.log")
+
+    def segments(self):
+        """Segment numbers on disk, oldest first"""
+        return sorted(
+            int(match.group(1))
+            for match in map(SEGMENT_NAME.match, os.listdir(self.directory)) if match
+        )
+
+    def _records(self, segment):
+        # A torn write at the end is not a whole record and is ignored
+        try:
+            return os.path.getsize(self._path(segment)) // RECORD.size
+        except FileNotFoundError:
+            return 0
+
+    def bounds(self):
+        """(first, end): sequence numbers of the oldest visit kept and one past the newest"""
+        segments = self.segments()
+        if not segments:
+            return 0, 0
+        return (segments[0] * SEGMENT_RECORDS,
+                segments[-1] * SEGMENT_RECORDS + self._records(segments[-1]))
+
+    # Writes
+
+    def append(self, visits):
+        """Add visits (dicts as for pack()) at the end of the log"""
+        data = b"".join(map(pack, visits))
+        if not data:
+            return
+        with self._lock, open(os.path.join(self.directory, ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            segments = self.segments()
+            segment = segments[-1] if segments else 0
+            while data:
+                path = self._path(segment)
+                with open(path, "ab") as log:
+                    used = log.tell()
+                    if used % RECORD.size:
+                        # Drop a record cut short by a crash
+                        used -= used % RECORD.size
+                        log.truncate(used)
+                    room = SEGMENT_RECORDS * RECORD.size - used
+                    if room > 0:
+                        log.write(data[:room])
+                        data = data[room:]
+                if data:
+                    segment += 1
+            self._prune()
+
+    def _prune(self):
+        if not self.max_segments:
+            return
+        segments = self.segments()
+        for segment in segments[:-self.max_segments]:
+            os.remove(self._path(segment))
+
+    # Reads
+
+    def _mapped(self, segment):
+        """(read-only mapping, record count) of a segment, or (None, 0)"""
+        try:
+            with open(self._path(segment), "rb") as log:
+                records = os.fstat(log.fileno()).st_size // RECORD.size
+                if not records:
+                    return None, 0
+                return mmap.mmap(log.fileno(), records * RECORD.size, access=mmap.ACCESS_READ), records
+        except FileNotFoundError:
+            # Pruned by a writer since it was listed
+            return None, 0
+
+    def tail(self, count):
+        """The newest `count` visits, newest first"""
+        visits = []
+        for segment in reversed(self.segments()):
+            if len(visits) >= count:
+                break
+            mapped, records = self._mapped(segment)
+            if mapped is None:
+                continue
+            with mapped:
+                for index in range(records - 1, max(records - (count - len(visits)), 0) - 1, -1):
+                    visits.append(unpack(mapped, index * RECORD.size, segment * SEGMENT_RECORDS + index))
+        return visits
+
+    def read(self, start, stop, descending=False):
+        """Yield the visits with sequence numbers in [start, stop), one at a time"""
+        first, end = self.bounds()
+        start, stop = max(start, first), min(stop, end)
+        if start >= stop:
+            return
+        segments = range(start // SEGMENT_RECORDS, (stop - 1) // SEGMENT_RECORDS + 1)
+        for segment in (reversed(segments) if descending else segments):
+            mapped, records = self._mapped(segment)
+            if mapped is None:
+                continue
+            base = segment * SEGMENT_RECORDS
+            low, high = max(start - base, 0), min(stop - base, records)
+            indexes = range(high - 1, low - 1, -1) if descending else range(low, high)
+            with mapped:
+                for index in indexes:
+                    yield unpack(mapped, index * RECORD.size, base + index)
+
+    def page(self, cursor=None, limit=1000, descending=False):
+        """(visits iterator, next cursor) for one page of history
+
+        Ascending pages start at `cursor` (default the oldest visit kept)
+        and the next cursor is where the following page starts, which
+        also picks up visits logged later. Descending pages end before
+        `cursor` (default the newest) and the next cursor is None once
+        the oldest visit kept has been reached.
+        """
+        first, end = self.bounds()
+        if descending:
+            stop = end if cursor is None else min(cursor, end)
+            start = max(stop - limit, first)
+            return self.read(start, stop, descending=True), (start if start > first else None)
+        start = first if cursor is None else max(cursor, first)
+        stop = min(start + limit, end)
+        return self.read(start, stop), max(start, stop)